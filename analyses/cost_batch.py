@@ -0,0 +1,269 @@
+from functools import reduce
+
+import numpy as np
+
+from analyses import Scenario
+from parts.Part import Part
+from pbcm.cost_items.Facility import Facility
+from pbcm.cost_items.Overhead import Overhead
+from pbcm.cost_items.Prepared_Process import PreparedProcess, prepare, prepare_processes
+from pbcm.cost_items.Process import ProcessStep
+from pbcm.cost_functions.Cost_Batch import CostBatch
+from pbcm.cost_functions.capital_recovery_factor import calc_crf
+from pbcm.cost_functions.cost_material import part_material
+
+
+# Vectorized counterparts of the pbcm.cost_functions helpers. Every numeric input may be a scalar or a NumPy array;
+# arrays broadcast against each other, so one call evaluates every row of a batch (draws, sweep points, ...).
+
+
+def _num(value) -> np.ndarray:
+    return np.asarray(value, dtype=float)
+
+
+def _num_or(value, default) -> np.ndarray:
+    """Array-safe `value or default`: None and zero entries are replaced by default."""
+    if value is None:
+        return _num(default)
+    value = _num(value)
+    return np.where(value == 0, default, value)
+
+
+def _ceil_if(flag, value) -> np.ndarray:
+    """math.ceil(value) where flag is set, value otherwise (flag may itself be an array of bools)."""
+    return np.where(np.asarray(flag, dtype=bool), np.ceil(value), value)
+
+
+def calc_eff_prod_vol_batch(apv, proc: dict) -> np.ndarray:
+    """Vectorized calc_eff_prod_vol."""
+    part_accept = reduce(np.multiply, [_num(v.mach.part_accept_rate) for v in proc.values()])
+    return np.ceil(apv / part_accept)
+
+
+def calc_mach_count_batch(dedicate_mach, eff_prod_vol, ann_ops_hrs, ps: PreparedProcess):
+    """Vectorized calc_mach_count. Returns n_mach, mach_hrs_tot and eff_part_vol."""
+    ann_part_vol = ps.ann_part_vol(_num(ann_ops_hrs))
+
+    eff_part_vol = eff_prod_vol * _num(ps.parts_per_unit)
+    mach_hrs_tot = eff_part_vol * ps.mach_hrs_unit
+    n_mach = _ceil_if(dedicate_mach, eff_part_vol / ann_part_vol)
+
+    return n_mach, mach_hrs_tot, eff_part_vol
+
+
+def calc_equip_cost_batch(ann_ops_hrs, ann_prod_vol, n_mach, discount_rate, ps: PreparedProcess):
+    """Vectorized calc_equip_cost."""
+    mach_crf = ps.mach_crf(_num(discount_rate), _num(ann_ops_hrs))
+
+    # Installation and maintenance costs were resolved to $ when the process step was prepared
+    mach_cost_ann = mach_crf * (_num(ps.price_mach) + ps.cost_inst) + ps.cost_maint
+
+    return n_mach * mach_cost_ann / ann_prod_vol
+
+
+def calc_consume_cost_batch(ann_prod_vol, eff_part_vol, mach_hrs_tot, ps: PreparedProcess):
+    """Vectorized calc_consume_cost."""
+    consume_cost_tot = _num(0.0)
+    for per_hr, per_part, consume_life, consume_price in ps.consumables:
+        if per_hr:
+            n_consumes = mach_hrs_tot / _num(consume_life)
+        elif per_part:
+            n_consumes = eff_part_vol / _num(consume_life)
+        else:
+            continue
+        consume_cost_tot = consume_cost_tot + n_consumes * _num(consume_price)
+    return consume_cost_tot / ann_prod_vol
+
+
+def calc_mat_cost_batch(ann_prod_vol, eff_prod_vol, ps: ProcessStep | PreparedProcess):
+    """Vectorized calc_mat_cost."""
+    if not ps or getattr(ps, 'mat_use', 0) == 0 or getattr(ps, 'part', None) is None:
+        return _num(0.0)
+    part = ps.part
+
+    mat = part_material(part)
+    price_mat = _num_or(getattr(mat, 'price_mat', 0.0), 0.0)
+    density = _num_or(getattr(mat, 'density', 0.0), 0.0)
+    recycling_rate = _num_or(getattr(mat, 'recycling_rate', 0.0), 0.0)
+
+    volume = _num_or(getattr(part, 'volume', 0.0), 0.0)
+    wt = _num_or(getattr(part, 'wt', 0.0), 0.0)
+    weight_per_part = np.where(volume > 0, volume * density, np.where(wt > 0, wt, 0.0))
+    scrap_rate = _num_or(getattr(getattr(ps, 'mach', None), 'scrap_rate', 0.0), 0.0)
+
+    eff_part_vol = eff_prod_vol * _num_or(getattr(ps, 'parts_per_unit', 1), 1)
+    mat_cost_tot = eff_part_vol * weight_per_part * (1 + scrap_rate * (1 - recycling_rate)) * price_mat
+    return mat_cost_tot / ann_prod_vol
+
+
+def calc_overhead_cost_alt_batch(over: Overhead, hx: Part, n_labor, eff_prod_vol, ann_labor_hrs, ann_prod_vol,
+                                 fac_rent, fac_size, discount_rate, salary):
+    """Vectorized calc_overhead_cost_alt."""
+    o = {k: _num(v) for k, v in vars(over).items() if k != 'raw'}
+
+    cost_unused_labor = salary * (np.ceil(n_labor) - n_labor)
+    n_mgmt = o['mgmt_ratio'] * n_labor
+    cost_mgmt = n_mgmt * o['mgmt_salary']
+    n_qa_parts = np.ceil(o['qa_inspect_frac'] * eff_prod_vol)
+    n_qa_labor = n_qa_parts * o['qa_time'] / ann_labor_hrs
+    cost_qa = n_qa_labor * o['qa_salary']
+    n_admin = n_labor * o['admin_ratio']
+    admin_cost = n_admin * o['admin_salary']
+    n_employee = n_labor + n_qa_labor + n_mgmt + n_admin
+    hr_cost = n_employee * o['hr_price']
+    cp_cost = o['cp_cost'] * n_employee
+    legal_cost = ann_prod_vol * o['legal_frac'] * 12 * o['legal_price']
+    insure_cost = o['insure_price']
+    acct_cost = 12 * o['acct_price']
+
+    n_office_employee = n_admin + n_mgmt + n_qa_labor
+    office_space = o['space_emp'] * n_office_employee
+    furn_cost = calc_crf(discount_rate, o['office_life']) * o['office_build_price'] * n_office_employee
+
+    n_inventory = ann_prod_vol / 365 * o['inventory_time']
+    height = _num(hx.height)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n_m2 = (o['inventory_stack_height'] / height) * 1 / (_num(hx.width) * _num(hx.length))
+        inventory_space = np.where(height == 0, 0.0, n_inventory / n_m2)
+
+    misc_space = o['misc_space_frac'] * (office_space + inventory_space + fac_size)
+    overhead_space = office_space + inventory_space + misc_space
+    space_cost = fac_rent * overhead_space + furn_cost
+    tot_space = overhead_space + fac_size
+    cleaning_cost = 12 * o['clean_price'] * tot_space
+    cost_supplies = n_employee * o['supply_price']
+    cost_it = n_employee * o['it_price']
+    pack_cost = o['crate_price'] * ann_prod_vol
+    building_util_cost = o['building_util'] * (overhead_space + fac_size)
+
+    overhead_cost_tot = (cost_unused_labor + cost_mgmt + cost_qa + cp_cost + legal_cost + insure_cost + hr_cost +
+                         admin_cost + acct_cost + space_cost + cleaning_cost + cost_supplies + cost_it + pack_cost +
+                         building_util_cost)
+    return overhead_cost_tot / ann_prod_vol
+
+
+def calc_cost_batch(ann_prod_vol, mfg_process, model_hx: Part, over: Overhead, fac: Facility) -> CostBatch:
+    """
+    Calculates process step and category costs for a batch of parameter sets in one call.
+
+    Parameters
+    ----------
+    ann_prod_vol: int, float or array
+        Annual production volume(s).
+
+    mfg_process: dict
+        Dict of ProcessSteps for all steps in manufacturing process [process step name: ProcessStep], or of their
+        PreparedProcesses (see prepare_processes). ProcessSteps are prepared here, once per call.
+
+    model_hx: Part
+        Part being manufactured.
+
+    over: Overhead
+        Overhead inputs.
+
+    fac: Facility
+        Facility-wide inputs.
+
+    Returns
+    -------
+    cost: CostBatch
+        Per-process and per-category costs with the broadcast shape of all inputs.
+
+    Notes
+    -----
+    Any numeric attribute of the supplied objects (and ann_prod_vol) may be a NumPy array holding one value per
+    parameter set; all arrays must broadcast against each other. This mirrors analyses.cost_output.calc_cost
+    step-by-step, including the math.ceil steps for effective production volume, dedicated equipment/labor and
+    overhead labor.
+    """
+    apv = _num(ann_prod_vol)
+    eff_prod_vol = calc_eff_prod_vol_batch(apv, mfg_process)
+    ann_ops_hrs = _num(fac.ann_ops_hrs)
+    ann_labor_hrs = _num(fac.ann_labor_hrs)
+    discount_rate = _num(fac.discount_rate)
+    salary = _num(fac.salary)
+    fac_crf = calc_crf(discount_rate, 20)
+
+    proc_cost = {}
+    fac_config = {}
+    n_labor_tot = _num(0.0)
+    fac_size_tot = _num(0.0)
+    for k, v in mfg_process.items():
+        v = prepare(v)
+        n_mach, mach_hrs_tot, eff_part_vol = calc_mach_count_batch(fac.dedicate_equip, eff_prod_vol, ann_ops_hrs, v)
+        mat_cost_proc = calc_mat_cost_batch(apv, eff_prod_vol, v)
+        equip_cost_proc = calc_equip_cost_batch(ann_ops_hrs, apv, n_mach, discount_rate, v)
+        consume_cost_proc = calc_consume_cost_batch(apv, eff_part_vol, mach_hrs_tot, v)
+
+        labor_hrs_tot = ann_ops_hrs * _num(v.laborfrac_cycle) * n_mach
+        n_labor = _ceil_if(fac.dedicate_labor, labor_hrs_tot / ann_labor_hrs)
+        labor_cost_proc = n_labor * salary * (1 + _num(fac.labor_burden)) / apv
+
+        fac_size = n_mach * _num(v.area_mach)
+        fac_cost_proc = fac_size * (_num(fac.fac_rent) + fac_crf * _num(fac.fac_buildout)) / apv
+
+        util_cost_proc = mach_hrs_tot * _num(v.elec_consume_rate) * _num(fac.elec_price) / apv
+
+        proc_cost_total = (mat_cost_proc + equip_cost_proc + labor_cost_proc + fac_cost_proc + util_cost_proc +
+                           consume_cost_proc)
+        fac_config[v.name_process_step] = {'n_mach': n_mach, 'mach_hrs_tot': mach_hrs_tot, 'n_labor': n_labor,
+                                           'fac_size': fac_size}
+        proc_cost[v.name_process_step] = {'total': proc_cost_total, 'material': mat_cost_proc,
+                                          'equip': equip_cost_proc, 'labor': labor_cost_proc, 'fac': fac_cost_proc,
+                                          'util': util_cost_proc, 'consume': consume_cost_proc}
+        n_labor_tot = n_labor_tot + n_labor
+        fac_size_tot = fac_size_tot + fac_size
+
+    overhead_cost_unit = calc_overhead_cost_alt_batch(over, model_hx, n_labor_tot, eff_prod_vol, ann_labor_hrs, apv,
+                                                      _num(fac.fac_rent), fac_size_tot, discount_rate, salary)
+
+    # Distribute overhead proportional to each step's non-material cost (see distribute_overhead)
+    tot = _num(0.0)
+    for v in proc_cost.values():
+        tot = tot + (v['total'] - v['material'])
+    for v in proc_cost.values():
+        over_proc = (v['total'] - v['material']) / tot * overhead_cost_unit
+        v['overhead'] = over_proc
+        v['total'] = v['total'] + over_proc
+
+    # Broadcast every result to the common batch shape
+    shape = np.broadcast_shapes(*[np.shape(x) for d in (proc_cost, fac_config) for v in d.values()
+                                  for x in v.values()])
+    for d in (proc_cost, fac_config):
+        for v in d.values():
+            for c, x in v.items():
+                v[c] = np.broadcast_to(x, shape)
+
+    # Per-kW and per-UA costs, as assemble_cost sets them
+    return CostBatch(proc_cost, fac_config, shape, 0, 0)
+
+
+def calc_cost_batch_obj(s: Scenario) -> CostBatch:
+    return calc_cost_batch(s.ann_prod_vol, prepare_processes(s.mfg_process), s.model_hx, s.over, s.fac)
+
+
+def calc_cost_sweep(apv_range, mfg_process, model_hx: Part, over: Overhead, fac: Facility,
+                    draw_ndim: int = 0) -> CostBatch:
+    """
+    Evaluates costs against annual production volume for all APV points in one broadcasted calc_cost_batch call.
+
+    Parameters
+    ----------
+    apv_range: array-like
+        Annual production volumes, one per point of the curve.
+
+    mfg_process, model_hx, over, fac:
+        Scenario objects, as in calc_cost_batch.
+
+    draw_ndim: int
+        Number of dimensions of the parameter arrays held by the scenario objects (e.g. 1 after SamplingPlan.apply
+        has written n draws onto them). The APV axis is placed in front of them, so every draw is evaluated at every
+        APV and uncertainty bands come out of the same call.
+
+    Returns
+    -------
+    cost: CostBatch
+        Costs of shape (n_apv,) + draw shape.
+    """
+    apv = _num(apv_range).reshape((-1,) + (1,) * draw_ndim)
+    return calc_cost_batch(apv, mfg_process, model_hx, over, fac)
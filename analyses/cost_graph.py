@@ -0,0 +1,145 @@
+from analyses import Scenario
+from analyses.cost_output import assemble_cost, calc_overhead_stage, calc_proc_stage
+from parts.Part import Part
+from pbcm.cost_functions.Cost_Result import CostResult
+from pbcm.cost_items.Facility import Facility
+from pbcm.cost_items.Overhead import Overhead
+from pbcm.cost_items.epv import calc_eff_prod_vol
+
+
+_EFF_PROD_VOL = 'eff_prod_vol'
+_OVERHEAD = 'overhead'
+_RESULT = 'result'
+
+
+class CostGraph:
+
+    def __init__(self, ann_prod_vol, mfg_process, model_hx: Part, over: Overhead, fac: Facility):
+        """
+        Memoized evaluation of calc_cost for what-if loops, where one input changes between evaluations.
+
+        The evaluation is split into nodes: the effective production volume, one stage per process step (machine
+        count, equipment, consumables, labor, facility, utilities and material costs), the facility-wide overhead and
+        the final result (overhead distribution). Each node records the objects it reads and the nodes whose values
+        it uses. Changing an input through `set` (or flagging an object changed in place with `touch`) marks the
+        nodes reading it dirty; `evaluate` then recomputes only those nodes, and a node's dependents only when its
+        value actually changed.
+
+        Parameters
+        ----------
+        ann_prod_vol: int or float
+            Annual production volume (settable later through the ann_prod_vol attribute).
+
+        mfg_process, model_hx, over, fac:
+            Scenario objects, as in calc_cost. Scalar inputs only; structural changes (adding process steps or
+            consumables) need a new graph.
+        """
+        self._ann_prod_vol = ann_prod_vol
+        self.mfg_process = mfg_process
+        self.model_hx = model_hx
+        self.over = over
+        self.fac = fac
+
+        self._compute = {}      # node: function returning its value
+        self._readers = {}      # id of input object: nodes reading it
+        self._dependents = {}   # node: nodes using its value
+        self._values = {}
+        self._dirty = set()
+        self.recomputed = 0     # nodes recomputed by the last evaluate
+        self.total_recomputed = 0
+
+        steps = list(mfg_process.values())
+        self._add_node(_EFF_PROD_VOL, self._eff_prod_vol, [self] + [ps.mach for ps in steps], [])
+        for ps in steps:
+            inputs = [self, ps, ps.mach, ps.part, getattr(ps.part, 'mat', None), model_hx, fac]
+            inputs += list(ps.mach.consume_list.values())
+            self._add_node(('process', ps.name_process_step), self._proc_stage(ps), inputs, [_EFF_PROD_VOL])
+        procs = [('process', ps.name_process_step) for ps in steps]
+        self._add_node(_OVERHEAD, self._overhead, [self, model_hx, over, fac], [_EFF_PROD_VOL] + procs)
+        self._add_node(_RESULT, self._result, [], [_OVERHEAD] + procs)
+
+    @classmethod
+    def from_scenario(cls, s: Scenario) -> "CostGraph":
+        return cls(s.ann_prod_vol, s.mfg_process, s.model_hx, s.over, s.fac)
+
+    @property
+    def ann_prod_vol(self):
+        return self._ann_prod_vol
+
+    @ann_prod_vol.setter
+    def ann_prod_vol(self, value):
+        self._ann_prod_vol = value
+        self.touch(self)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self._compute)
+
+    def _add_node(self, node, compute, inputs, uses):
+        self._compute[node] = compute
+        self._dependents[node] = set()
+        for obj in inputs:
+            if obj is not None:
+                self._readers.setdefault(id(obj), set()).add(node)
+        for u in uses:
+            self._dependents[u].add(node)
+        self._dirty.add(node)
+
+    def set(self, obj, attr, value):
+        """Sets an attribute of an input object and marks the nodes reading the object dirty."""
+        setattr(obj, attr, value)
+        self.touch(obj)
+
+    def touch(self, *objs):
+        """Marks the nodes reading the given input objects dirty (e.g. after changing their attributes directly)."""
+        for obj in objs:
+            self._dirty.update(self._readers.get(id(obj), ()))
+
+    def invalidate(self):
+        """Marks every node dirty."""
+        self._dirty.update(self._compute)
+
+    def evaluate(self) -> CostResult:
+        """
+        Brings the graph up to date and returns the costs, as calc_cost would for the current inputs. The number of
+        nodes recomputed is reported in the recomputed attribute.
+        """
+        self.recomputed = 0
+        # Nodes were added in dependency order
+        for node, compute in self._compute.items():
+            if node not in self._dirty:
+                continue
+            self._dirty.discard(node)
+            value = compute()
+            self.recomputed += 1
+            if node not in self._values or value != self._values[node]:
+                self._dirty.update(self._dependents[node])
+            self._values[node] = value
+        self.total_recomputed += self.recomputed
+        return self._values[_RESULT]
+
+    def _eff_prod_vol(self):
+        return calc_eff_prod_vol(self._ann_prod_vol, self.mfg_process)
+
+    def _proc_stage(self, ps):
+        def compute():
+            return calc_proc_stage(self._ann_prod_vol, self._values[_EFF_PROD_VOL], ps, self.model_hx, self.fac)
+        return compute
+
+    def _overhead(self):
+        n_labor_tot = 0
+        fac_size_tot = 0
+        for ps in self.mfg_process.values():
+            fac_config = self._values[('process', ps.name_process_step)][0]
+            n_labor_tot = n_labor_tot + fac_config['n_labor']
+            fac_size_tot = fac_size_tot + fac_config['fac_size']
+        return calc_overhead_stage(self._ann_prod_vol, self._values[_EFF_PROD_VOL], n_labor_tot, fac_size_tot,
+                                   self.model_hx, self.over, self.fac)
+
+    def _result(self):
+        fac_config = {}
+        proc_cost = {}
+        for ps in self.mfg_process.values():
+            k = ps.name_process_step
+            fac_config[k], proc_cost[k] = self._values[('process', k)]
+        return assemble_cost(fac_config, proc_cost, self._values[_OVERHEAD])
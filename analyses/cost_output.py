@@ -2,8 +2,8 @@ from analyses import Scenario
 from parts.Part import Part
 from pbcm.cost_items.Facility import Facility
 from pbcm.cost_items.Overhead import Overhead
-from pbcm.cost_functions.Cost_Breakdown import CostBreakdown
-from pbcm.cost_functions.dist_overhead import distribute_overhead
+from pbcm.cost_functions.Cost_Result import CostResult
+from pbcm.cost_functions.dist_overhead import calc_overhead_shares
 from pbcm.cost_functions.cost_consumables import calc_consume_cost
 from pbcm.cost_functions.cost_equipment import calc_mach_count, calc_equip_cost
 from pbcm.cost_functions.cost_facility import calc_fac_size, calc_fac_cost
@@ -12,121 +12,216 @@ from pbcm.cost_functions.cost_material import calc_mat_cost
 from pbcm.cost_functions.cost_overhead import calc_overhead_cost_alt
 from pbcm.cost_functions.cost_utility import calc_util_cost
 from pbcm.cost_items.epv import calc_eff_prod_vol
+from pbcm.cost_items.Prepared_Process import prepare, prepare_processes
+import numpy as np
 import pandas as pd
-import ast
 
 
-def calc_cost(ann_prod_vol, mfg_process, model_hx: Part, over: Overhead, fac: Facility):
-    eff_prod_vol = calc_eff_prod_vol(ann_prod_vol, mfg_process)
+# Column names of the cost categories (keys of CostResult.proc_cost) in exported results
+_COST_COLUMNS = {"material": "Material", "equip": "Equipment", "labor": "Labor", "fac": "Facility", "util": "Utilities",
+                 "consume": "Consumables", "overhead": "Overhead", "total": "Total"}
 
-    tot_mat_cost_unit = 0
-    tot_equip_cost_unit = 0
-    tot_labor_cost_unit = 0
-    tot_util_cost_unit = 0
-    tot_fac_cost_unit = 0
-    tot_consume_cost_unit = 0
-    n_labor_tot = 0
-    fac_size_tot = 0
-    proc_cost_mat = {}
-    proc_cost_bd_over={}
 
-    for k, v in mfg_process.items():
+def calc_proc_stage(ann_prod_vol, eff_prod_vol, v, model_hx: Part, fac: Facility):
+    """
+    Calculates the facility configuration and costs (before overhead) of one process step. v may be a ProcessStep or
+    a PreparedProcess; a ProcessStep is prepared once here and the prepared form passed to every cost function.
 
-        # print("Calculating cost for "+str(k))
-        n_mach, mach_hrs_tot, eff_part_vol = calc_mach_count(fac.dedicate_equip, eff_prod_vol, fac.ann_ops_hrs, v, model_hx)
-        # print("No. of machines = "+ str(n_mach))
-        # print("Machine operating hours = " + str(mach_hrs_tot))
-        # print("Effective part volume = " + str(eff_part_vol))
-        # print("\n")
+    Returns
+    -------
+    fac_config: dict
+        {'n_mach', 'mach_hrs_tot', 'n_labor', 'fac_size'} of the step.
 
+    proc_cost: dict
+        Cost per unit of the step by category ('total', 'material', 'equip', 'labor', 'fac', 'util', 'consume').
+    """
+    v = prepare(v)
+    n_mach, mach_hrs_tot, eff_part_vol = calc_mach_count(fac.dedicate_equip, eff_prod_vol, fac.ann_ops_hrs, v, model_hx)
 
-        mat_cost_proc = calc_mat_cost(ann_prod_vol, eff_prod_vol, v)
+    mat_cost_proc = calc_mat_cost(ann_prod_vol, eff_prod_vol, v.step)
 
-        equip_cost_proc = calc_equip_cost(fac.ann_ops_hrs, ann_prod_vol, n_mach, fac.discount_rate, v)
+    equip_cost_proc = calc_equip_cost(fac.ann_ops_hrs, ann_prod_vol, n_mach, fac.discount_rate, v)
 
-        consume_cost_proc = calc_consume_cost(ann_prod_vol, eff_part_vol, mach_hrs_tot, v)
+    consume_cost_proc = calc_consume_cost(ann_prod_vol, eff_part_vol, mach_hrs_tot, v)
 
-        n_labor = calc_n_labor(n_mach, fac.dedicate_labor, eff_prod_vol, fac.ann_ops_hrs, fac.ann_labor_hrs, v)
-        labor_cost_proc = calc_labor_cost(ann_prod_vol, fac.salary, fac.labor_burden, n_labor)
+    n_labor = calc_n_labor(n_mach, fac.dedicate_labor, eff_prod_vol, fac.ann_ops_hrs, fac.ann_labor_hrs, v)
+    labor_cost_proc = calc_labor_cost(ann_prod_vol, fac.salary, fac.labor_burden, n_labor)
 
-        fac_size = calc_fac_size(n_mach, v)
-        fac_cost_proc = calc_fac_cost(ann_prod_vol, fac_size, fac)
+    fac_size = calc_fac_size(n_mach, v)
+    fac_cost_proc = calc_fac_cost(ann_prod_vol, fac_size, fac)
 
-        util_cost_proc = calc_util_cost(ann_prod_vol, mach_hrs_tot, fac.elec_price, v)
+    util_cost_proc = calc_util_cost(ann_prod_vol, mach_hrs_tot, fac.elec_price, v)
 
-        proc_cost_total = mat_cost_proc + equip_cost_proc + labor_cost_proc + fac_cost_proc + util_cost_proc + consume_cost_proc
-        fac_config = {'n_mach': n_mach, 'mach_hrs_tot': mach_hrs_tot, 'n_labor': n_labor, 'fac_size': fac_size}
-        v.add_fac_config(fac_config)
-        proc_cost = {'total': proc_cost_total, 'material':mat_cost_proc, 'equip': equip_cost_proc, 'labor': labor_cost_proc, 'fac': fac_cost_proc,
-                     'util': util_cost_proc, 'consume': consume_cost_proc}
-        v.add_proc_cost(proc_cost)
-        proc_cost_mat[v.name_process_step] = mat_cost_proc
-        proc_cost_bd_over[v.name_process_step] = proc_cost_total - mat_cost_proc  # Exclude material cost for overhead distribution
+    proc_cost_total = mat_cost_proc + equip_cost_proc + labor_cost_proc + fac_cost_proc + util_cost_proc + consume_cost_proc
+    fac_config = {'n_mach': n_mach, 'mach_hrs_tot': mach_hrs_tot, 'n_labor': n_labor, 'fac_size': fac_size}
+    proc_cost = {'total': proc_cost_total, 'material':mat_cost_proc, 'equip': equip_cost_proc, 'labor': labor_cost_proc, 'fac': fac_cost_proc,
+                 'util': util_cost_proc, 'consume': consume_cost_proc}
+    return fac_config, proc_cost
 
-        tot_mat_cost_unit = tot_mat_cost_unit + mat_cost_proc
-        tot_equip_cost_unit = tot_equip_cost_unit + equip_cost_proc
-        tot_labor_cost_unit = tot_labor_cost_unit + labor_cost_proc
-        tot_util_cost_unit = tot_util_cost_unit + util_cost_proc
-        tot_fac_cost_unit = tot_fac_cost_unit + fac_cost_proc
-        tot_consume_cost_unit = tot_consume_cost_unit + consume_cost_proc
-        n_labor_tot = n_labor_tot + n_labor
-        fac_size_tot = fac_size_tot + fac_size
 
+def calc_overhead_stage(ann_prod_vol, eff_prod_vol, n_labor_tot, fac_size_tot, model_hx: Part, over: Overhead,
+                        fac: Facility):
+    """Calculates the facility-wide overhead cost per unit from the summed labor and floor space of all steps."""
     overhead_cost_unit = calc_overhead_cost_alt(over, model_hx, n_labor_tot, eff_prod_vol, fac.ann_labor_hrs,
                                                 ann_prod_vol, fac.fac_rent, fac_size_tot, fac.discount_rate, fac.salary)
-
-    # tot_cost_unit = sum(proc_cost_bd.values())
-    # overhead_cost_unit = calc_overhead_cost(tot_cost_unit, fac.overhead_frac)
-
-    proc_cost_bd = distribute_overhead(proc_cost_bd_over, overhead_cost_unit, mfg_process)
-    for k,v in proc_cost_bd.items():
-        # Add meterial cost back to process step total cost
-        v = v + proc_cost_mat[k]
-
-    cost_bd = CostBreakdown()
-    cost_bd.add_cost_cat(tot_mat_cost_unit, tot_equip_cost_unit, tot_labor_cost_unit, tot_util_cost_unit, tot_fac_cost_unit,
-                         overhead_cost_unit, tot_consume_cost_unit)
-
-    cost_bd.add_proc_cost(proc_cost_bd)
-    cost_unit = tot_mat_cost_unit + tot_equip_cost_unit + tot_labor_cost_unit + overhead_cost_unit + tot_util_cost_unit + tot_fac_cost_unit + tot_consume_cost_unit
-
-    # model_hx.calc_rating_kw()
-    # cost_kw = cost_unit / model_hx.rating_kw
-    # cost_ua = cost_unit / model_hx.rating_ua
-
-    # cost_kw = cost_unit
-    # cost_ua = cost_unit
-    # cost_bd.add_cost_total(cost_unit, cost_ua, cost_kw)
-
-    cost_bd.add_cost_total(cost_unit,0,0)
+    return overhead_cost_unit
+
+
+def assemble_cost(fac_config, proc_cost, overhead_cost_unit) -> CostResult:
+    """
+    Distributes overhead over the process steps' costs (new dicts, the arguments are not modified) and returns the
+    CostResult.
+    """
+    # Exclude material cost for overhead distribution
+    proc_cost_bd_over = {k: v['total'] - v['material'] for k, v in proc_cost.items()}
+    proc_cost = {k: dict(v) for k, v in proc_cost.items()}
+    for k, over_proc in calc_overhead_shares(proc_cost_bd_over, overhead_cost_unit).items():
+        proc_cost[k]['overhead'] = over_proc
+        proc_cost[k]['total'] = proc_cost[k]['total'] + over_proc
+
+    return CostResult(proc_cost, fac_config, 0, 0)
+
+
+def _require_scalar(**inputs):
+    """
+    Raises ValueError naming the attributes (e.g. "fac.salary") of inputs, their dicts and nested objects that hold
+    arrays, if there are any. The parsed json data kept in raw attributes is not searched.
+    """
+    found = []
+    seen = set()
+    stack = list(inputs.items())
+    while stack:
+        name, v = stack.pop()
+        if isinstance(v, np.ndarray):
+            if v.ndim:
+                found.append(name)
+        elif id(v) in seen:
+            continue
+        elif isinstance(v, dict):
+            seen.add(id(v))
+            stack.extend((f"{name}[{k!r}]", x) for k, x in v.items())
+        elif isinstance(v, (list, tuple)):
+            seen.add(id(v))
+            stack.extend((f"{name}[{i}]", x) for i, x in enumerate(v))
+        elif hasattr(v, '__dict__') and not isinstance(v, type):
+            seen.add(id(v))
+            stack.extend((f"{name}.{k}", x) for k, x in vars(v).items() if k != 'raw')
+    if found:
+        found.sort()
+        more = f" and {len(found) - 3} more" if len(found) > 3 else ""
+        raise ValueError(f"calc_cost evaluates scalar inputs only; inputs holding arrays: {', '.join(found[:3])}{more}. "
+                         f"Use analyses.cost_batch.calc_cost_batch for array-valued scenarios")
+
+
+def calc_cost(ann_prod_vol, mfg_process, model_hx: Part, over: Overhead, fac: Facility) -> CostResult:
+    """
+    Calculates process step and category costs of a scenario.
+
+    The supplied objects are only read: facility configurations and costs are returned in an immutable CostResult
+    rather than stored on the ProcessSteps, so several scenarios (or volumes) can be evaluated concurrently, e.g. in
+    threads, against one shared model.
+
+    Parameters
+    ----------
+    ann_prod_vol: int or float
+        Annual production volume.
+
+    mfg_process: dict
+        Dict of ProcessSteps for all steps in manufacturing process [process step name: ProcessStep], or of their
+        PreparedProcesses (see prepare_processes).
+
+    model_hx: Part
+        Part being manufactured.
+
+    over: Overhead
+        Overhead inputs.
+
+    fac: Facility
+        Facility-wide inputs.
+
+    Returns
+    -------
+    cost_bd: CostResult
+        Per-process costs (including distributed overhead), facility configurations and category totals.
+
+    Raises
+    ------
+    ValueError
+        If any input holds an array (e.g. a scenario built for several levels, or with sampled draws written onto
+        it); such scenarios are evaluated with analyses.cost_batch.calc_cost_batch.
+    """
+    inputs = dict(ann_prod_vol=ann_prod_vol, mfg_process=mfg_process, model_hx=model_hx, over=over, fac=fac)
+    try:
+        eff_prod_vol = calc_eff_prod_vol(ann_prod_vol, mfg_process)
+
+        n_labor_tot = 0
+        fac_size_tot = 0
+        fac_config = {}
+        proc_cost = {}
+
+        for k, v in mfg_process.items():
+            fac_config[v.name_process_step], proc_cost[v.name_process_step] = calc_proc_stage(ann_prod_vol, eff_prod_vol,
+                                                                                              v, model_hx, fac)
+            n_labor_tot = n_labor_tot + fac_config[v.name_process_step]['n_labor']
+            fac_size_tot = fac_size_tot + fac_config[v.name_process_step]['fac_size']
+
+        overhead_cost_unit = calc_overhead_stage(ann_prod_vol, eff_prod_vol, n_labor_tot, fac_size_tot, model_hx, over,
+                                                 fac)
+
+        cost_bd = assemble_cost(fac_config, proc_cost, overhead_cost_unit)
+    except (TypeError, ValueError):
+        # Array-valued inputs fail in the scalar helpers (math.ceil, ...); name them instead
+        _require_scalar(**inputs)
+        raise
+    # Arrays that did not fail still must not end up in a CostResult
+    if np.ndim(cost_bd.cost_unit):
+        _require_scalar(**inputs)
 
     return cost_bd
 
 
 def calc_cost_obj(s: Scenario):
-    cost_bd = calc_cost(s.ann_prod_vol, s.mfg_process, s.model_hx, s.over, s.fac)
+    cost_bd = calc_cost(s.ann_prod_vol, prepare_processes(s.mfg_process), s.model_hx, s.over, s.fac)
     return cost_bd
 
-def conv_cost_to_df(mfg_process, cost_bd):
-
-    # Creating dataframe to export results to csv
-    df_cost=pd.DataFrame()
-    for i, j in mfg_process.items():
-        data = ast.literal_eval(str(j.proc_cost))
-        data.update({"Process": i})
-        data = {key: [value] for key, value in data.items()}
-        df_temp = pd.DataFrame.from_dict(data)
-        df_cost = pd.concat([df_cost, df_temp], ignore_index=True)
-        # print(i + " : " + str(j.proc_cost))
-
-    df_cost = df_cost[["Process","material", "equip","labor","fac","util","consume","overhead","total"]]
-    df_cost = df_cost.rename(columns={"material":"Material", "equip":"Equipment", "labor":"Labor", "fac":"Facility", "util":"Utilities", "consume":"Consumables", "overhead":"Overhead", "total":"Total"})
-    column_totals = df_cost.sum(numeric_only=True)
-    totals_df = pd.DataFrame(column_totals).T
-    totals_df ["Process"] = ["Total"]
-    last_column = totals_df.iloc[:, -1]
-    totals_df.drop(totals_df.columns[-1], axis=1, inplace=True)
-    totals_df.insert(0, last_column.name, last_column)
-    df_cost = pd.concat([df_cost, totals_df])
-
-    return df_cost
\ No newline at end of file
+def conv_cost_to_df(cost_bd, tidy: bool = False) -> pd.DataFrame:
+    """
+    Converts cost results into a DataFrame in one construction, with a Total row per draw from vectorized sums.
+
+    Parameters
+    ----------
+    cost_bd: CostResult or CostBatch
+        Costs of one scenario (calc_cost) or of a batch of draws or sweep points (calc_cost_batch).
+
+    tidy: bool
+        Return one row per (draw, process, category) instead of one row per process with a column per category.
+
+    Returns
+    -------
+    df_cost: DataFrame
+        Wide: columns Process, Material, Equipment, Labor, Facility, Utilities, Consumables, Overhead, Total, one row
+        per process step followed by a 'Total' row. Tidy: columns Process, Category and Value. Batch results
+        additionally get a leading Draw column (flat index into the batch shape), with the draws in order.
+    """
+    # (n_draw, n_process + 1, n_category), the last process row holding the column totals
+    cube = np.asarray(cost_bd.to_array(), dtype=float)
+    cube = np.moveaxis(cube.reshape(cube.shape[0], cube.shape[1], -1), 2, 0)
+    cube = np.concatenate([cube, cube.sum(axis=1, keepdims=True)], axis=1)
+    n_draw, n_proc, n_cat = cube.shape
+
+    processes = np.array(list(cost_bd.proc_cost) + ["Total"], dtype=object)
+    categories = np.array([_COST_COLUMNS[c] for c in cost_bd.COST_CATS], dtype=object)
+    batch = len(getattr(cost_bd, 'shape', ())) > 0
+
+    if tidy:
+        cols = {"Draw": np.repeat(np.arange(n_draw), n_proc * n_cat),
+                "Process": np.tile(np.repeat(processes, n_cat), n_draw),
+                "Category": np.tile(categories, n_draw * n_proc),
+                "Value": cube.ravel()}
+    else:
+        cols = {"Draw": np.repeat(np.arange(n_draw), n_proc), "Process": np.tile(processes, n_draw)}
+        cols.update(zip(categories, cube.reshape(n_draw * n_proc, n_cat).T))
+    if not batch:
+        del cols["Draw"]
+
+    return pd.DataFrame(cols)
@@ -5,11 +5,12 @@ import seaborn as sns
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 
 from analyses import Scenario
-from analyses.cost_output import calc_cost_obj
+from analyses.cost_batch import calc_cost_sweep
+from pbcm.cost_items.Prepared_Process import prepare_processes
 from tools.plot_format import format_axis_line
 
 
-def calc_cost_v_apv(apv_min, apv_max, s: Scenario):
+def calc_cost_v_apv(apv_min, apv_max, s: Scenario, n_points=100):
     """
     Calculates parts cost_functions at various annual production volumes (APV).
 
@@ -21,31 +22,57 @@ def calc_cost_v_apv(apv_min, apv_max, s: Scenario):
         Largest APV value.
     s: Scenario
         An instance of Scenario class.
+    n_points: int
+        Number of log-spaced APV values (before duplicates are removed).
     Returns
     -------
     cost_v_apv: DataFrame
         Calculated unit, per kW, and per UA costs for each APV.
     """
 
-    # Create an approximately 100 point log-spaced set of APV values between APV min and max values.
+    # Create an approximately n_points point log-spaced set of APV values between APV min and max values.
     #   Duplicate values removed.
-    apv_range = np.unique(np.around(np.geomspace(apv_min, apv_max, 100)))
-    data_apv = []
+    apv_range = np.unique(np.around(np.geomspace(apv_min, apv_max, n_points)))
 
-    # Calculate cost_functions for each APV value.
-    for ann_prod_vol in apv_range:
-        # Replace APV in Scenario
-        dummy_scenario = s.copy(ann_prod_vol=ann_prod_vol)
-        # Calculate cost_functions at new APV
-        cost_bd = calc_cost_obj(dummy_scenario)
-        data_apv.append([ann_prod_vol, cost_bd.cost_kw, cost_bd.cost_ua, cost_bd.cost_unit])
+    # Calculate cost_functions at every APV value in one vectorized evaluation.
+    cost = calc_cost_sweep(apv_range, prepare_processes(s.mfg_process), s.model_hx, s.over, s.fac)
 
     # Store calculation results in pandas DataFrame.
-    cost_v_apv = pd.DataFrame(data_apv, columns=["Annual Production Volume", "Cost/kW-th", "Cost/UA", "Cost/unit"])
+    cost_v_apv = pd.DataFrame({"Annual Production Volume": apv_range, "Cost/kW-th": cost.cost_kw,
+                               "Cost/UA": cost.cost_ua, "Cost/unit": cost.cost_unit})
 
     return cost_v_apv
 
 
+def calc_cost_curves(apv_range, s: Scenario):
+    """
+    Calculates unit cost curves by cost category and by process step in one vectorized evaluation.
+
+    Parameters
+    ----------
+    apv_range: array-like
+        APV values of the curves.
+    s: Scenario
+        An instance of Scenario class.
+    Returns
+    -------
+    cost_cat: DataFrame
+        Unit cost of each cost category ("Material", "Equipment", ...) and the total ("Total") at each APV.
+    cost_proc: DataFrame
+        Total unit cost of each process step at each APV.
+    """
+    apv_range = np.asarray(apv_range, dtype=float)
+    cost = calc_cost_sweep(apv_range, prepare_processes(s.mfg_process), s.model_hx, s.over, s.fac)
+
+    cost_cat = pd.DataFrame({"APV": apv_range, "Material": cost.mat_cost, "Equipment": cost.equip_cost,
+                             "Labor": cost.labor_cost, "Facility": cost.fac_cost, "Utilities": cost.util_cost,
+                             "Consumables": cost.consume_cost, "Overhead": cost.overhead_cost,
+                             "Total": cost.cost_unit})
+    cost_proc = pd.DataFrame({"APV": apv_range, **{k: v["total"] for k, v in cost.proc_cost.items()}})
+
+    return cost_cat, cost_proc
+
+
 def plot_cost_v_apv(cost_v_apv, filepath: str, units="Cost/kW-th"):
     """
     Plots cost_functions in $/kW vs. annual production volume (APV).
@@ -1,69 +1,51 @@
-from typing import Mapping
+from typing import Mapping, Sequence
+
+import numpy as np
 
 from pbcm.cost_items.Facility import Facility
-from pbcm.cost_items.Consumable import Consumable
-from pbcm.cost_items.Machine import Machine
 from pbcm.cost_items.Overhead import Overhead
 from pbcm.cost_items.Process import ProcessStep
 from parts.Part import Part
-from tools.json_tools import object_from_json, objects_from_dir
-from pathlib import Path
-import json
+from tools.dict_tools import level_value
+from tools.input_catalog import InputCatalog
+from tools.input_tree import InputTree
+
+
+def create_hx(join_method: str = "Laser Welding", level: str | Sequence[str] = 'base', inputs: InputTree = None):
+    # Parsed input_data tree; parsed once per change of input_data unless an in-memory (e.g. sampled) tree is supplied
+    if inputs is None:
+        inputs = InputTree.load('../input_data')
 
+    # Catalog of the tree; objects are built as they are requested below
+    catalog = InputCatalog(inputs, level=level)
 
-def create_hx(join_method: str = "Laser Welding", level: str = 'base'):
     # parts from JSON file
-    model_hx = object_from_json('../input_data/parts/mphx_sabic/mphx.json', Part, level=level)
-    all_parts: Mapping[str, Part] = objects_from_dir('../input_data/parts/mphx_sabic/', Part, level=level)
+    model_hx = catalog.part('parts/mphx_sabic', 'MPHX')
     # Only include subparts that belong to the MPHX parent
-    subparts: Mapping[str, Part] = {k: v for k, v in all_parts.items() if getattr(v, 'parent_part', None) == 'MPHX'}
+    subparts: Mapping[str, Part] = catalog.subparts('parts/mphx_sabic', 'MPHX')
     model_hx.add_subparts(subparts)
 
-    # MACHINES from JSON files
-    im_machine = object_from_json('../input_data/equipment/injection_molding_machine_SABIC.json', Machine, level=level)
-    lw_machine = object_from_json('../input_data/equipment/laser_welding_machine.json', Machine, level=level)
-    as_machine = object_from_json('../input_data/equipment/assembly_machine.json', Machine, level=level)
-    gl_machine = object_from_json('../input_data/equipment/gluing_machine.json', Machine, level=level)
-    dc_machine = object_from_json('../input_data/equipment/die_cutting_machine.json', Machine, level=level)
-    lifting_machine = object_from_json('../input_data/equipment/lifting_machine.json', Machine, level=level)
-
-    # CONSUMABLES from JSON files
-    consumables: Mapping[str, Consumable] = objects_from_dir('../input_data/consumables', Consumable, level=level)
-    im_machine.add_consumables(consumables)
-    lw_machine.add_consumables(consumables)
-    as_machine.add_consumables(consumables)
-    gl_machine.add_consumables(consumables)
-    dc_machine.add_consumables(consumables)
-    lifting_machine.add_consumables(consumables)
-
-
-    # Load process parameter files (time_cycle, batch_size) from input_data/processes
-    processes_dir = Path('../input_data/processes')
-    process_defs = {}
-    if processes_dir.exists():
-        for fp in processes_dir.glob('*.json'):
-            try:
-                with open(fp, 'r') as f:
-                    pdata = json.load(f)
-                name = pdata.get('name')
-                if name:
-                    process_defs[name] = pdata
-            except Exception:
-                # ignore malformed files
-                continue
+    # MATERIALS from JSON files, resolved once onto the parts made of them
+    for p in [model_hx] + list(subparts.values()):
+        p.add_material(catalog.material(p.mat_choice))
+
+    # MACHINES from JSON files, with their CONSUMABLES; the join machine is loaded with the selected join step
+    im_machine = catalog.machine('IM_Machine_SABIC')
+    as_machine = catalog.machine('Assembly_Machine')
+    dc_machine = catalog.machine('DC_Machine')
+    lifting_machine = catalog.machine('Lifting_Machine')
+
+    # Process parameter files (time_cycle, batch_size) from input_data/processes
+    process_defs = catalog.index.processes
 
     # helper to get time_cycle (in hours) and batch_size for a given process name
     def _get_proc_params(proc_name: str, default_cycle_sec: float = 0, default_batch: int = 1):
         pdata = process_defs.get(proc_name, {})
         tc = pdata.get('time_cycle', default_cycle_sec)
-        # If time_cycle is a dict with levels, pick requested level
-        if isinstance(tc, dict):
-            tc_val = tc.get(level, tc.get('base', default_cycle_sec))
-        else:
-            tc_val = tc
-        # time_cycle is in seconds; convert to hours
+        # time_cycle is in seconds; convert to hours. If it is a dict with levels, pick requested level(s)
         try:
-            tc_seconds = float(tc_val)
+            tc_val = level_value(tc, level, fallback='base')
+            tc_seconds = np.asarray(tc_val, dtype=float) if np.ndim(tc_val) else float(tc_val)
         except Exception:
             tc_seconds = float(default_cycle_sec)
         tc_hours = tc_seconds / 3600.0
@@ -91,11 +73,6 @@ def create_hx(join_method: str = "Laser Welding", level: str = 'base'):
     tc_die_cut_film, bs_die_cut_film = _get_proc_params("Die Cutting Film")
     die_cut_film = ProcessStep("Die Cutting Film", dc_machine, tc_die_cut_film, bs_die_cut_film, part=im_plate_subpart, mat_use=0, parts_per_unit= im_plate_subpart.count)
 
-    tc_las_weld, bs_las_weld = _get_proc_params("Laser Welding")
-    las_weld = ProcessStep("Laser Welding", lw_machine, tc_las_weld, bs_las_weld, part=im_plate_subpart, mat_use=0, parts_per_unit= im_plate_subpart.count)
-
-    tc_gluing, bs_gluing = _get_proc_params("Gluing")
-    gluing = ProcessStep("Gluing", gl_machine, tc_gluing, bs_gluing, part=im_plate_subpart, mat_use=0, parts_per_unit= im_plate_subpart.count)
 
     tc_fs_assembly, bs_fs_assembly = _get_proc_params("Fin Stack Assembly")
     fs_assembly = ProcessStep("Fin Stack Assembly",as_machine, tc_fs_assembly, bs_fs_assembly, mat_use=0, parts_per_unit= 1)
@@ -119,14 +96,14 @@ def create_hx(join_method: str = "Laser Welding", level: str = 'base'):
     # Include only the selected join step
     jm = (join_method or "").strip().lower()
     if jm == "laser welding":
-        mfg_process["Laser Welding"] = las_weld
-    elif jm == "gluing":
-        mfg_process["Gluing"] = gluing
+        tc_las_weld, bs_las_weld = _get_proc_params("Laser Welding")
+        mfg_process["Laser Welding"] = ProcessStep("Laser Welding", catalog.machine('LW_Machine'), tc_las_weld, bs_las_weld, part=im_plate_subpart, mat_use=0, parts_per_unit= im_plate_subpart.count)
     else:
-        # Default to gluing if unrecognized
-        mfg_process["Gluing"] = gluing
+        # Gluing, also the default if unrecognized
+        tc_gluing, bs_gluing = _get_proc_params("Gluing")
+        mfg_process["Gluing"] = ProcessStep("Gluing", catalog.machine('Gluing_Machine'), tc_gluing, bs_gluing, part=im_plate_subpart, mat_use=0, parts_per_unit= im_plate_subpart.count)
 
     # FACILITY-WIDE INPUTS/ASSUMPTIONS
-    over = object_from_json('../input_data/facility_wide/overhead_inputs.json', Overhead, level=level)
-    fac = object_from_json('../input_data/facility_wide/facility_inputs.json', Facility, level=level)
+    over = catalog.object('facility_wide/overhead_inputs.json', Overhead)
+    fac = catalog.object('facility_wide/facility_inputs.json', Facility)
     return model_hx, mfg_process, over, fac
@@ -1,8 +1,10 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
 from analyses import Scenario
-from analyses.cost_output import calc_cost_obj
+from analyses.cost_batch import calc_cost_sweep
+from pbcm.cost_items.Prepared_Process import prepare_processes
 from tools.plot_format import format_stackbar
 
 
@@ -17,39 +19,22 @@ def calc_proc_cat(apv_details, s: Scenario, units="Cost/kW-th"):
         cost_norm = 1
 
 
-    # Breakdown by cost_functions category & subprocess
-    data_cat = []
-    data_cat_am = []
-    data_proc = []
-
-    for ann_prod_vol in apv_details:
-        dummy_scenario = s.copy(ann_prod_vol=ann_prod_vol)
-        cost_bd = calc_cost_obj(dummy_scenario)
-
-        # Cost breakdown by category
-        data_cat.append([ann_prod_vol, cost_bd.equip_cost, cost_bd.mat_cost, cost_bd.labor_cost, cost_bd.fac_cost,
-                         cost_bd.util_cost, cost_bd.overhead_cost, cost_bd.consume_cost])
-
-        # Cost breakdown by subprocess
-        data = [ann_prod_vol, cost_bd.mat_cost]
-        for k, v in cost_bd.proc_cost.items():
-            data.append(v)
-        data_proc.append(data)
-
-        # Hybrid cost_functions breakdown (AM by category, material, combined remaining subprocess costs)
-        post_proc_cost = 0
-        for k, v in s.mfg_process.items():
-            if k == "3D Printing (LPBF)":
-                post_proc_cost = post_proc_cost
-            else:
-                post_proc_cost = post_proc_cost + v.proc_cost["total"]
-        data = [ann_prod_vol, cost_bd.mat_cost, post_proc_cost]
-        for k, v in s.mfg_process["3D Printing (LPBF)"].proc_cost.items():
-            if k == "total":
-                continue
-            else:
-                data.append(v)
-        data_cat_am.append(data)
+    # Breakdown by cost_functions category & subprocess, all APVs in one vectorized evaluation
+    apv = np.asarray(apv_details, dtype=float)
+    cost_bd = calc_cost_sweep(apv, prepare_processes(s.mfg_process), s.model_hx, s.over, s.fac)
+
+    # Cost breakdown by category
+    data_cat = np.column_stack([apv, cost_bd.equip_cost, cost_bd.mat_cost, cost_bd.labor_cost, cost_bd.fac_cost,
+                                cost_bd.util_cost, cost_bd.overhead_cost, cost_bd.consume_cost])
+
+    # Cost breakdown by subprocess
+    data_proc = np.column_stack([apv, cost_bd.mat_cost] +
+                                [v["total"] - v["material"] for v in cost_bd.proc_cost.values()])
+
+    # Hybrid cost_functions breakdown (AM by category, material, combined remaining subprocess costs)
+    post_proc_cost = sum(v["total"] for k, v in cost_bd.proc_cost.items() if k != "3D Printing (LPBF)")
+    data_cat_am = np.column_stack([apv, cost_bd.mat_cost, post_proc_cost] +
+                                  [v for k, v in cost_bd.proc_cost["3D Printing (LPBF)"].items() if k != "total"])
 
     # Cost by cat Dataframe
     cost_cat = pd.DataFrame(data_cat,
@@ -23,6 +23,12 @@ class Part:
             self.subs[k] = v
         return self
 
+    def add_material(self, mat):
+        """Sets the Material the part is made of (resolved from mat_choice, see cost_material.MaterialRegistry)."""
+
+        self.mat = mat
+        return self
+
     def copy(self, **kwargs) -> "Part":
         res = copy(self)
         for k, v in kwargs:
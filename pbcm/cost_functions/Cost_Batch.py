@@ -0,0 +1,74 @@
+from copy import copy
+
+import numpy as np
+
+
+class CostBatch:
+    """Holds cost results for a batch of parameter sets (one entry per draw or sweep point)."""
+
+    # Keys of the per-process cost dicts, matching ProcessStep.proc_cost
+    COST_CATS = ('material', 'equip', 'labor', 'fac', 'util', 'consume', 'overhead', 'total')
+
+    def __init__(self, proc_cost, fac_config, shape, cost_ua=0, cost_kw=0):
+        """
+        Initializes the batch with per-process costs and facility configurations.
+
+        Parameters
+        ----------
+        proc_cost: dict
+            Dict of cost arrays for each process step [process step name: {cost category: array}]. Cost categories
+            are the keys of ProcessStep.proc_cost and include the distributed overhead.
+
+        fac_config: dict
+            Dict of facility configuration arrays for each process step [process step name: {'n_mach', 'mach_hrs_tot',
+            'n_labor', 'fac_size'}].
+
+        shape: tuple
+            Common (broadcast) shape of the batch. Every array in proc_cost and fac_config has this shape.
+
+        cost_ua: int, float or array
+            Cost per UA (broadcast to shape).
+
+        cost_kw: int, float or array
+            Cost per kW (broadcast to shape).
+        """
+        self.proc_cost = proc_cost
+        self.fac_config = fac_config
+        self.shape = shape
+
+        # Totals by cost category, named as in CostBreakdown
+        self.mat_cost = self.cat_total('material')
+        self.equip_cost = self.cat_total('equip')
+        self.labor_cost = self.cat_total('labor')
+        self.overhead_cost = self.cat_total('overhead')
+        self.util_cost = self.cat_total('util')
+        self.fac_cost = self.cat_total('fac')
+        self.consume_cost = self.cat_total('consume')
+        self.cost_unit = (self.mat_cost + self.equip_cost + self.labor_cost + self.overhead_cost + self.util_cost +
+                          self.fac_cost + self.consume_cost)
+        self.cost_ua = np.broadcast_to(cost_ua, shape)
+        self.cost_kw = np.broadcast_to(cost_kw, shape)
+
+    @property
+    def processes(self) -> list:
+        return list(self.proc_cost)
+
+    def copy(self, **kwargs) -> "CostBatch":
+        res = copy(self)
+        for k, v in kwargs.items():
+            setattr(res, k, v)
+        return res
+
+    def cat_total(self, cat) -> np.ndarray:
+        """Sums one cost category over all process steps."""
+
+        tot = np.zeros(self.shape)
+        for v in self.proc_cost.values():
+            tot = tot + v[cat]
+        return tot
+
+    def to_array(self) -> np.ndarray:
+        """Returns all costs as one array of shape (n_process, n_category) + shape, ordered as COST_CATS."""
+
+        return np.array([[v[c] for c in self.COST_CATS] for v in self.proc_cost.values()]).reshape(
+            (len(self.proc_cost), len(self.COST_CATS)) + self.shape)
@@ -0,0 +1,98 @@
+from types import MappingProxyType
+
+import numpy as np
+
+from pbcm.cost_functions.Cost_Batch import CostBatch
+
+
+def _frozen(d: dict) -> MappingProxyType:
+    """Read-only view of a dict of dicts (the nested dicts are copied)."""
+    return MappingProxyType({k: MappingProxyType(dict(v)) for k, v in d.items()})
+
+
+def _thawed(d) -> dict:
+    return {k: dict(v) for k, v in d.items()}
+
+
+class CostResult:
+    """Immutable cost results of one scenario evaluation (see analyses.cost_output.calc_cost).
+
+    Scalar counterpart of CostBatch, with the category totals named as in CostBreakdown. Results are held in read-only
+    mappings and attributes cannot be reassigned, so a result can be shared between threads, and the ProcessSteps it
+    was computed from are left untouched.
+    """
+
+    # Keys of the per-process cost dicts
+    COST_CATS = CostBatch.COST_CATS
+
+    def __init__(self, proc_cost, fac_config, cost_ua=0, cost_kw=0):
+        """
+        Initializes the result with per-process costs and facility configurations.
+
+        Parameters
+        ----------
+        proc_cost: dict
+            Dict of costs for each process step [process step name: {cost category: cost per unit}]. Cost categories
+            are COST_CATS and include the distributed overhead. Process steps keep the order of the supplied dict.
+
+        fac_config: dict
+            Dict of facility configurations for each process step [process step name: {'n_mach', 'mach_hrs_tot',
+            'n_labor', 'fac_size'}].
+
+        cost_ua: int or float
+            Cost per UA.
+
+        cost_kw: int or float
+            Cost per kW.
+        """
+        init = object.__setattr__
+        init(self, 'proc_cost', _frozen(proc_cost))
+        init(self, 'fac_config', _frozen(fac_config))
+
+        # Totals by cost category, named as in CostBreakdown
+        init(self, 'mat_cost', self.cat_total('material'))
+        init(self, 'equip_cost', self.cat_total('equip'))
+        init(self, 'labor_cost', self.cat_total('labor'))
+        init(self, 'overhead_cost', self.cat_total('overhead'))
+        init(self, 'util_cost', self.cat_total('util'))
+        init(self, 'fac_cost', self.cat_total('fac'))
+        init(self, 'consume_cost', self.cat_total('consume'))
+        init(self, 'cost_unit', self.mat_cost + self.equip_cost + self.labor_cost + self.overhead_cost +
+             self.util_cost + self.fac_cost + self.consume_cost)
+        init(self, 'cost_ua', cost_ua)
+        init(self, 'cost_kw', cost_kw)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CostResult is immutable, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"CostResult is immutable, cannot delete '{name}'")
+
+    def __reduce__(self):
+        # Mapping proxies cannot be pickled; rebuild from plain dicts
+        return CostResult, (_thawed(self.proc_cost), _thawed(self.fac_config), self.cost_ua, self.cost_kw)
+
+    @property
+    def processes(self) -> list:
+        return list(self.proc_cost)
+
+    def copy(self, **kwargs) -> "CostResult":
+        """Creates a new result, replacing any of the constructor arguments (proc_cost, fac_config, cost_ua, cost_kw)."""
+        args = {'proc_cost': _thawed(self.proc_cost), 'fac_config': _thawed(self.fac_config),
+                'cost_ua': self.cost_ua, 'cost_kw': self.cost_kw}
+        args.update(kwargs)
+        return CostResult(**args)
+
+    def cat_total(self, cat) -> float:
+        """Sums one cost category over all process steps."""
+
+        tot = 0
+        for v in self.proc_cost.values():
+            tot = tot + v[cat]
+        return tot
+
+    def to_array(self) -> np.ndarray:
+        """Returns all costs as one array of shape (n_process, n_category), ordered as COST_CATS."""
+
+        return np.array([[v[c] for c in self.COST_CATS] for v in self.proc_cost.values()], dtype=float).reshape(
+            (len(self.proc_cost), len(self.COST_CATS)))
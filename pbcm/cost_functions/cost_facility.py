@@ -1,10 +1,11 @@
 from pbcm.cost_items.Facility import Facility
+from pbcm.cost_items.Prepared_Process import PreparedProcess, prepare
 from pbcm.cost_items.Process import ProcessStep
 from pbcm.cost_functions.capital_recovery_factor import calc_crf
 
 
-def calc_fac_size(n_mach, ps: ProcessStep) -> float:
-    fac_size = n_mach * (ps.mach.area_floor_space + ps.mach.area_clearance)
+def calc_fac_size(n_mach, ps: ProcessStep | PreparedProcess) -> float:
+    fac_size = n_mach * prepare(ps).area_mach
 
     return fac_size
 
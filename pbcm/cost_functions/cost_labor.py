@@ -1,9 +1,10 @@
 import math
 
+from pbcm.cost_items.Prepared_Process import PreparedProcess, prepare
 from pbcm.cost_items.Process import ProcessStep
 
-def calc_n_labor(n_mach,dedicate_labor: bool, eff_prod_vol, ann_ops_hrs, ann_labor_hrs, ps: ProcessStep):
-    labor_hrs_tot = (ann_ops_hrs * ps.mach.laborfrac_cycle * n_mach)
+def calc_n_labor(n_mach,dedicate_labor: bool, eff_prod_vol, ann_ops_hrs, ann_labor_hrs, ps: ProcessStep | PreparedProcess):
+    labor_hrs_tot = (ann_ops_hrs * prepare(ps).laborfrac_cycle * n_mach)
     # labor_hrs_batch = ps.time_cycle * ps.mach.laborfrac_cycle + ps.mach.time_setup * ps.mach.laborfrac_setup + ps.mach.time_teardown * ps.mach.laborfrac_teardown + ps.mach.time_heat * ps.mach.laborfrac_heat + ps.mach.time_cool * ps.mach.laborfrac_cool
     # labor_hrs_tot = eff_prod_vol * labor_hrs_batch
 
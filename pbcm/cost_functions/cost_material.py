@@ -1,31 +1,94 @@
 from pathlib import Path
 import json
+from pbcm.cost_items.Material import Material
 from pbcm.cost_items.Process import ProcessStep
 
 
-def _load_material(mat_choice: str) -> dict:
-    mats_dir = Path(__file__).resolve().parents[2] / 'input_data' / 'materials'
-    if not mat_choice or not mats_dir.exists():
-        return {}
-    wanted = mat_choice.lower()
-    for p in mats_dir.iterdir():
-        if not p.is_file() or p.suffix.lower() != '.json':
-            continue
-        try:
-            data = json.loads(p.read_text())
-        except Exception:
-            continue
-        name = str(data.get('name_mat', '')).lower()
-        if p.stem.lower() == wanted or name == wanted:
-            return data
-    return {}
+_MATERIALS_DIR = Path(__file__).resolve().parents[2] / 'input_data' / 'materials'
+
+# Registries read from material directories [(directory, level): (directory signature, MaterialRegistry)]
+_registry_cache = {}
+
+
+class MaterialRegistry:
+
+    def __init__(self, materials: dict):
+        """
+        Initializes a lookup of the Materials parts can be made of.
+
+        Parameters
+        ----------
+        materials: dict
+            Dict of Materials [file stem: Material]. Each material is found by its file stem or its name_mat (case
+            insensitive); when several match, the first one wins.
+        """
+        self.materials = materials
+        self.index = {}
+        for stem, mat in materials.items():
+            for key in (stem, mat.name_mat):
+                if key:
+                    self.index.setdefault(str(key).lower(), mat)
+
+    @classmethod
+    def from_dir(cls, mats_dir, level='base') -> "MaterialRegistry":
+        """Creates the registry from the json files of a material directory."""
+        from tools.dict_tools import from_dict
+
+        materials = {}
+        for p in sorted(Path(mats_dir).iterdir()) if Path(mats_dir).exists() else []:
+            if not p.is_file() or p.suffix.lower() != '.json':
+                continue
+            try:
+                data = json.loads(p.read_text())
+            except Exception:
+                continue
+            mat = from_dict(Material, data, level)
+            mat.raw = data
+            materials[p.stem] = mat
+        return cls(materials)
+
+    def get(self, mat_choice):
+        """Returns the Material named mat_choice, or None if there is none."""
+        if not mat_choice:
+            return None
+        return self.index.get(str(mat_choice).lower())
+
+
+def _dir_signature(mats_dir: Path) -> tuple:
+    if not mats_dir.exists():
+        return ()
+    return tuple(sorted((p.name, p.stat().st_mtime_ns, p.stat().st_size) for p in mats_dir.iterdir() if p.is_file()))
+
+
+def load_materials(mats_dir=None, level='base') -> MaterialRegistry:
+    """
+    Returns the registry of a material directory (default input_data/materials). Registries are cached and only
+    re-read when a file in the directory is added, removed or modified.
+    """
+    mats_dir = Path(mats_dir) if mats_dir is not None else _MATERIALS_DIR
+    sig = _dir_signature(mats_dir)
+    cached = _registry_cache.get((mats_dir, level))
+    if cached is None or cached[0] != sig:
+        cached = (sig, MaterialRegistry.from_dir(mats_dir, level))
+        _registry_cache[(mats_dir, level)] = cached
+    return cached[1]
+
+
+def part_material(part):
+    """
+    Material a part is made of: the one set by Part.add_material when the scenario was built, else the part's
+    mat_choice looked up in input_data/materials.
+    """
+    if hasattr(part, 'mat'):
+        return part.mat
+    return load_materials().get(getattr(part, 'mat_choice', None))
 
 
 def calc_mat_cost(annual_prod_vol: float, eff_prod_vol: float, ps: ProcessStep) -> float:
     """Per-step material cost per accepted unit based on ps.part and ps.mach.
     - If ps.mat_use == 0: return 0
     - weight_per_part = volume*density (if volume>0) else wt (if wt>0)
-    - scrap_rate from ps.mach.scrap_rate; material from ../input_data/materials
+    - scrap_rate from ps.mach.scrap_rate; material from ps.part (see part_material)
     - eff_part_vol = eff_prod_vol * ps.parts_per_unit
     - mat_cost_tot = eff_part_vol* weight_per_part * (1 + scrap_rate*(1-recycling_rate)) * price_mat
     - mat_cost_unit = mat_cost_tot / annual_prod_vol
@@ -37,11 +100,10 @@ def calc_mat_cost(annual_prod_vol: float, eff_prod_vol: float, ps: ProcessStep)
     if part is None:
         return 0.0
 
-    mat = _load_material(getattr(part, 'mat_choice', None))
-    price_node = mat.get('price_mat', {}) if isinstance(mat, dict) else {}
-    price_mat = (price_node.get('base', 0.0) if isinstance(price_node, dict) else float(price_node or 0.0)) or 0.0
-    density = float(mat.get('density', 0.0) or 0.0)
-    recycling_rate = float(mat.get('recycling_rate', 0.0) or 0.0)
+    mat = part_material(part)
+    price_mat = float(getattr(mat, 'price_mat', 0.0) or 0.0)
+    density = float(getattr(mat, 'density', 0.0) or 0.0)
+    recycling_rate = float(getattr(mat, 'recycling_rate', 0.0) or 0.0)
 
     volume = float(getattr(part, 'volume', 0.0) or 0.0)
     wt = float(getattr(part, 'wt', 0.0) or 0.0)
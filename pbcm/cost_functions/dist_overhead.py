@@ -1,6 +1,34 @@
+def calc_overhead_shares(proc_cost_bd, overhead):
+    """
+    Splits overhead across process steps proportional to each steps' portion of non-overhead & non-materials costs.
+    Neither argument is modified.
+
+    Parameters
+    ----------
+    proc_cost_bd: dict
+        Dict of cost_functions for each process step [process step name: process step cost_functions].
+
+    overhead: int or float
+        Total cost_functions of overhead expenses.
+
+    Returns
+    -------
+    shares: dict
+        Overhead allocated to each process step [process step name: overhead cost_functions].
+    """
+    # Get total cost_functions for all process steps (without material cost_functions).
+    tot = 0
+    for k, v in proc_cost_bd.items():
+        tot = tot + v
+
+    return {k: v / tot * overhead for k, v in proc_cost_bd.items()}
+
+
 def distribute_overhead(proc_cost_bd, overhead, mfg_process):
     """
     Distributes overhead across process steps proportional to each steps' portion of non-overhead & non-materials costs.
+    Updates proc_cost_bd and the proc_cost attribute of each ProcessStep in place; see calc_overhead_shares for a
+    version without side effects.
 
     Parameters
     ----------
@@ -17,15 +45,9 @@ def distribute_overhead(proc_cost_bd, overhead, mfg_process):
     -------
 
     """
-    # Get total cost_functions for all process steps (without material cost_functions).
-    tot = 0
-    for k, v in proc_cost_bd.items():
-        tot = tot + v
-
     # Distribute overhead across process steps.
-    for k, v in proc_cost_bd.items():
-        over = v / tot * overhead
-        proc_cost_bd[k] = v + over
+    for k, over in calc_overhead_shares(proc_cost_bd, overhead).items():
+        proc_cost_bd[k] = proc_cost_bd[k] + over
         # Update process step cost_functions attribute
         mfg_process[k].proc_cost['overhead'] = over
         mfg_process[k].proc_cost['total'] = mfg_process[k].proc_cost['total'] + over
@@ -3,7 +3,7 @@ from copy import copy
 
 class Material:
 
-    def __init__(self, name_mat, density, price_mat, raw=None):
+    def __init__(self, name_mat, density, price_mat, recycling_rate=0, raw=None):
         """
          Initializes an object to hold attributes of a material used in fabrication of parts.
 
@@ -18,6 +18,9 @@ class Material:
         price_mat: float or int
             Unit price ($/kg) of the material.
 
+        recycling_rate: float or int
+            Fraction of the scrapped material that is recovered and reused.
+
         raw: dict
             Dictionary of raw data for objects created from an external data file.
 
@@ -30,12 +33,13 @@ class Material:
         self.name_mat = name_mat
         self.density = density
         self.price_mat = price_mat
+        self.recycling_rate = recycling_rate
         self.raw = raw
 
     def copy(self, **kwargs) -> "Material":
         """Creates a copy of the object, updates attributes for specified kwargs, and returns updated object."""
 
         res = copy(self)
-        for k, v in kwargs:
+        for k, v in kwargs.items():
             setattr(res, k, v)
         return res
@@ -0,0 +1,123 @@
+import numpy as np
+
+from pbcm.cost_functions.capital_recovery_factor import calc_crf
+from pbcm.cost_items.Process import ProcessStep
+
+
+def resolve_cost(value, base) -> float:
+    """
+    Interprets a machine cost input: absolute numbers, fractional percentages (0 < v < 1) or percentage strings like
+    '10%'. A percentage is applied to base (the machine price). Unparseable values count as 0. Arrays of numbers (one
+    value per draw of a batch) are interpreted element-wise.
+    """
+    if value is None:
+        return 0.0
+    # Strings like '10%'
+    if isinstance(value, str):
+        v = value.strip()
+        if v.endswith('%'):
+            try:
+                return float(v[:-1]) / 100.0 * base
+            except Exception:
+                return 0.0
+        try:
+            return float(v)
+        except Exception:
+            return 0.0
+    try:
+        fv = np.asarray(value, dtype=float)
+    except Exception:
+        return 0.0
+    # Treat fractional values between 0 and 1 as percentages of base, otherwise as absolute
+    if fv.ndim:
+        return np.where((fv > 0) & (fv < 1), fv * base, fv)
+    fv = float(fv)
+    if 0 < fv < 1:
+        return fv * base
+    return fv
+
+
+class PreparedProcess:
+    """Derived quantities of a ProcessStep and its Machine, computed once and read by the cost functions."""
+
+    def __init__(self, ps: ProcessStep):
+        """
+        Prepares a process step for cost evaluation.
+
+        Parameters
+        ----------
+        ps: ProcessStep
+            Process step (with its machine and consumables) as currently set. Changing any of their attributes
+            afterwards requires preparing the step again. Numeric attributes may hold arrays (one value per draw of a
+            batch, see analyses.cost_batch); the derived quantities are then arrays too.
+
+        Notes
+        _____
+        - mach_hrs_unit: machine hours per part (cycle, setup, teardown, heat and cool time of a batch / batch size)
+        - cost_inst, cost_maint: installation and annual maintenance cost in $, percentages resolved against price_mach
+        - area_mach: floor space plus clearance per machine
+        - consumables: (per machine hour, per part, life, price) of each consumable; the first two are flags telling
+          whether its life is counted in hours or in parts
+        """
+        m = ps.mach
+        self.step = ps
+        self.mach = m
+        self.name_process_step = ps.name_process_step
+        self.parts_per_unit = ps.parts_per_unit
+        self.part = ps.part
+        self.mat_use = ps.mat_use
+
+        mach_hrs_batch = ps.time_cycle + m.time_setup + m.time_teardown + m.time_heat + m.time_cool
+        self.mach_hrs_unit = mach_hrs_batch*1.00/ps.batch_size
+
+        self.name_mach = m.name_mach
+        self.price_mach = m.price_mach
+        self.cost_inst = resolve_cost(getattr(m, 'cost_inst', 0.0), m.price_mach)
+        self.cost_maint = resolve_cost(getattr(m, 'cost_maint', 0.0), m.price_mach)
+        self.mach_life = m.mach_life
+        self.mach_life_unit = m.mach_life_unit
+        self._crf_years = {}    # discount rate: CRF of a mach_life in years
+
+        self.laborfrac_cycle = m.laborfrac_cycle
+        self.area_mach = m.area_floor_space + m.area_clearance
+        self.elec_consume_rate = m.elec_consume_rate
+
+        self.consumables = [(v.life_unit == "hrs" or v.life_unit == "hr", v.life_unit == "parts", v.consume_life,
+                             v.consume_price) for v in m.consume_list.values()]
+
+    def ann_part_vol(self, ann_ops_hrs) -> float:
+        """Parts one machine can process per year."""
+        return ann_ops_hrs*1.00/self.mach_hrs_unit
+
+    def mach_crf(self, discount_rate, ann_ops_hrs):
+        """
+        Capital recovery factor of the machine. A mach_life in parts is converted to years at the annual part volume
+        of one machine; the CRF of a mach_life in years only depends on the discount rate and is kept per (scalar)
+        discount rate.
+        """
+        if self.mach_life_unit == "years":
+            if np.ndim(discount_rate):
+                return calc_crf(discount_rate, self.mach_life)
+            key = float(discount_rate)
+            crf = self._crf_years.get(key)
+            if crf is None:
+                crf = self._crf_years[key] = calc_crf(discount_rate, self.mach_life)
+            return crf
+        elif self.mach_life_unit == "parts":
+            return calc_crf(discount_rate, self.mach_life/self.ann_part_vol(ann_ops_hrs))
+        raise ValueError(f"Unsupported mach_life_unit '{self.mach_life_unit}' for machine {self.name_mach}")
+
+
+def prepare(ps) -> PreparedProcess:
+    """Returns ps if it is already prepared, else a PreparedProcess of it."""
+    return ps if isinstance(ps, PreparedProcess) else PreparedProcess(ps)
+
+
+def prepare_processes(mfg_process: dict) -> dict:
+    """
+    Prepares every step of a manufacturing process. The returned dict can be passed to calc_cost or calc_cost_batch
+    in place of mfg_process, so repeated evaluations of an unchanged process (e.g. at several volumes) skip the
+    preparation. The prepared steps do not follow later changes to the steps (e.g. the draws of a sampling plan);
+    prepare them again after writing new values.
+    """
+    return {k: prepare(v) for k, v in mfg_process.items()}
@@ -1,5 +1,43 @@
 import inspect
-from copy import deepcopy
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def init_params(clazz) -> frozenset:
+    """Names of the parameters of a class's __init__, looked up once per class."""
+    return frozenset(inspect.signature(clazz.__init__).parameters)
+
+
+def level_value(v, level, fallback=None):
+    """
+    Value of one leaf of a multi-level dict at a level.
+
+    Parameters
+    ----------
+    v:
+        Leaf value: a {level: value} dict, or a plain value that applies to every level.
+
+    level: str or sequence of str
+        Level to read. With several levels, the values are returned as one NumPy array (one entry per level), or as
+        a single value if they are all equal.
+
+    fallback: str, optional
+        Level read where the requested one is missing. By default a missing level raises KeyError.
+
+    Returns
+    -------
+    Value at the level(s).
+    """
+    if type(v) is not dict:
+        return v
+    if isinstance(level, str):
+        return v[level] if fallback is None or level in v else v[fallback]
+    vals = [level_value(v, lv, fallback) for lv in level]
+    if all(x == vals[0] for x in vals[1:]):
+        return vals[0]
+    return np.asarray(vals)
 
 
 def select_level(d, level):
@@ -10,23 +48,25 @@ def select_level(d, level):
         ----------
         d: dict
             Multi-level dict from which function will create single level dict
-        level: str
-
-            Specifies level of dict to use for single level dict
+        level: str or sequence of str
+            Specifies level of dict to use for single level dict. With several levels, leaves that differ between
+            them become arrays with one entry per level (see level_value).
 
         Returns
         -------
         dl: dict
-            Single level dict from level specified in function input
+            Single level dict from level specified in function input. A new dict; d is not modified, and values
+            without levels are shared with d rather than copied.
         flattened: bool
             Indicator of whether an values in dl were flattened from multi-level dict
         """
-    dl = deepcopy(d)
+    dl = {}
     flattened = False
-    for k, v in dl.items():
+    for k, v in d.items():
         if type(v) is dict:
-            dl[k] = v[level]
+            v = level_value(v, level)
             flattened = True
+        dl[k] = v
     return dl, flattened
 
 
@@ -40,8 +80,10 @@ def from_dict(clazz, d, level='base'):
         Class of which function will create an instance
     d: dict
         Dict containing parameters for function
-    level: str
-        For multi-level dict, specifies level of dict to use for Class instance
+    level: str or sequence of str
+        For multi-level dict, specifies level of dict to use for Class instance. With several levels, the instance
+        holds an array (one entry per level) for each parameter that differs between them, for the batched cost
+        engine (analyses.cost_batch).
 
     Returns
     -------
@@ -49,11 +91,6 @@ def from_dict(clazz, d, level='base'):
         Instance of clazz
 
     """
-    df, flattened = select_level(d, level)
-    allowed = dict(inspect.signature(clazz.__init__).parameters)
-    df2 = {k: v for k, v in iter(df.items()) if k in allowed}
-    if flattened:
-        return clazz(**df2)
-    else:
-        return clazz(**df2)
-
+    allowed = init_params(clazz)
+    df2 = {k: level_value(v, level) for k, v in d.items() if k in allowed}
+    return clazz(**df2)
@@ -0,0 +1,127 @@
+import weakref
+from pathlib import PurePosixPath
+
+from parts.Part import Part
+from pbcm.cost_items.Consumable import Consumable
+from pbcm.cost_items.Machine import Machine
+from pbcm.cost_functions.cost_material import MaterialRegistry
+from pbcm.cost_items.Material import Material
+from tools.input_tree import InputTree
+
+
+# Indexes of scanned trees [InputTree: _CatalogIndex]; dropped with the tree
+_index_cache = weakref.WeakKeyDictionary()
+
+
+class _CatalogIndex:
+
+    def __init__(self, tree: InputTree):
+        """Indexes the files of a tree in one pass over its parsed data (paths only; no objects are built)."""
+        self.machines = {}      # name_mach: path
+        self.consumables = {}   # name: path (last file wins, as in InputTree.objects)
+        self.materials = []     # paths of material files
+        self.parts = {}         # (part directory, name): path
+        self.children = {}      # (part directory, parent_part): {name: path}
+        self.processes = {}     # name: parsed data
+        for rel, data in tree.data.items():
+            path = PurePosixPath(rel)
+            top = path.parts[0]
+            if len(path.parts) < 2 or not isinstance(data, dict):
+                continue
+            if top == 'equipment':
+                self.machines[data.get('name_mach')] = rel
+            elif top == 'consumables':
+                self.consumables[data.get('name')] = rel
+            elif top == 'materials':
+                self.materials.append(rel)
+            elif top == 'parts':
+                parent = str(path.parent)
+                self.parts[(parent, data.get('name'))] = rel
+                self.children.setdefault((parent, data.get('parent_part')), {})[data.get('name')] = rel
+            elif top == 'processes' and data.get('name'):
+                self.processes[data['name']] = data
+
+        # Consumables grouped by the machine they belong to [name_mach: {name: path}]
+        self.consumables_by_mach = {}
+        for name, rel in self.consumables.items():
+            self.consumables_by_mach.setdefault(tree.data[rel].get('name_mach'), {})[name] = rel
+
+
+def catalog_index(tree: InputTree) -> _CatalogIndex:
+    """Returns the index of a tree, scanning the tree on first use."""
+    index = _index_cache.get(tree)
+    if index is None:
+        index = _index_cache[tree] = _CatalogIndex(tree)
+    return index
+
+
+class InputCatalog:
+
+    def __init__(self, tree: InputTree, level='base'):
+        """
+        Initializes an indexed view of an input_data tree, from which scenario builders pull the objects they need.
+
+        Files are indexed by name_mach (machines), name (consumables, parts and processes) and parent_part (parts)
+        when a tree is first catalogued; materials are looked up through a MaterialRegistry of the tree's material
+        files. Objects are only built when first requested and then shared within the catalog, so building a
+        scenario costs the same however many unused files the tree holds.
+
+        Parameters
+        ----------
+        tree: InputTree
+            Parsed input_data tree.
+
+        level: str or sequence of str
+            Level of the nested json data used for the objects (see InputTree.object).
+        """
+        self.tree = tree
+        self.level = level
+        self.index = catalog_index(tree)
+        self._objects = {}
+        self._materials = None
+
+    def object(self, rel, clazz):
+        """Returns the instance of clazz built from a file of the tree, building it on first request."""
+        obj = self._objects.get(rel)
+        if obj is None:
+            obj = self._objects[rel] = self.tree.object(rel, clazz, self.level)
+        return obj
+
+    def machine(self, name_mach) -> Machine:
+        """Returns the Machine named name_mach, with its consumables added."""
+        rel = self.index.machines[name_mach]
+        m = self._objects.get(rel)
+        if m is None:
+            m = self.object(rel, Machine)
+            m.add_consumables(self.consumables(name_mach))
+        return m
+
+    def consumables(self, name_mach) -> dict:
+        """Returns the Consumables of the machine named name_mach [name: Consumable]."""
+        return {name: self.object(rel, Consumable)
+                for name, rel in self.index.consumables_by_mach.get(name_mach, {}).items()}
+
+    @property
+    def materials(self) -> MaterialRegistry:
+        """Registry of the tree's material files, built on first use."""
+        if self._materials is None:
+            self._materials = MaterialRegistry({PurePosixPath(rel).stem: self.object(rel, Material)
+                                                for rel in self.index.materials})
+        return self._materials
+
+    def material(self, mat_choice):
+        """Returns the Material named mat_choice (see MaterialRegistry.get), or None if there is none."""
+        return self.materials.get(mat_choice)
+
+    def part(self, rel_dir, name) -> Part:
+        """Returns the Part named name from a part directory of the tree."""
+        return self.object(self.index.parts[(str(PurePosixPath(rel_dir)), name)], Part)
+
+    def subparts(self, rel_dir, parent_part) -> dict:
+        """Returns the Parts of a part directory whose parent_part is parent_part [name: Part]."""
+        rels = self.index.children.get((str(PurePosixPath(rel_dir)), parent_part), {})
+        return {name: self.object(rel, Part) for name, rel in rels.items()}
+
+    def process(self, name) -> dict:
+        """Returns the parsed process parameter file (time_cycle, batch_size, ...) named name, or {} if there is none."""
+        return self.index.processes.get(name, {})
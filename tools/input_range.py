@@ -1,5 +1,13 @@
 from copy import copy
 
+import numpy as np
+from scipy import stats
+
+
+# Distributions an input may declare. Draws are bounded by lower/upper: triangular and PERT use best as the mode,
+# normal and lognormal (of mean and std_dev, defaulting to best and a sixth of the range) are truncated to the bounds.
+DISTRIBUTIONS = ('uniform', 'triangular', 'pert', 'normal', 'lognormal')
+
 
 class InputRange:
 
@@ -13,6 +21,9 @@ class InputRange:
         scenario_obj_type: str
             Describes which scenario object hold the input value.
 
+        distribution: str, optional
+            Name of the distribution of the input parameter (see DISTRIBUTIONS). Defaults to uniform.
+
         upper: float or int, optional
             Upper bound value for input parameter.
 
@@ -48,3 +59,55 @@ class InputRange:
         for k, v in kwargs.items():
             setattr(res, k, v)
         return res
+
+    def expected(self) -> float:
+        """Expected value of the input parameter (numerical for the truncated and non-uniform distributions)."""
+        if (self.distribution or 'uniform') == 'uniform':
+            return (self.lower + self.upper) / 2
+        # Mean of the inverse CDF over a fine midpoint grid of [0, 1]
+        n = 1 << 16
+        return float(self.ppf((np.arange(n) + 0.5) / n).mean())
+
+    def ppf(self, u) -> np.ndarray:
+        """
+        Maps uniform samples onto the distribution of the input parameter (inverse CDF), for a whole vector of draws at
+        once.
+
+        Parameters
+        ----------
+        u: ndarray
+            Samples in [0, 1).
+
+        Returns
+        -------
+        x: ndarray
+            Parameter values, within [lower, upper].
+        """
+        u = np.asarray(u, dtype=float)
+        dist = self.distribution or 'uniform'
+        if dist == 'uniform':
+            return self.lower + (self.upper - self.lower) * u
+
+        lo, hi = min(self.lower, self.upper), max(self.lower, self.upper)
+        width = hi - lo
+        if width == 0:
+            return np.full(u.shape, float(lo))
+        best = (lo + hi) / 2 if self.best is None else min(max(self.best, lo), hi)
+        if dist == 'triangular':
+            return stats.triang.ppf(u, (best - lo) / width, loc=lo, scale=width)
+        if dist == 'pert':
+            a = 1 + 4 * (best - lo) / width
+            b = 1 + 4 * (hi - best) / width
+            return lo + width * stats.beta.ppf(u, a, b)
+
+        mean = best if self.mean is None else self.mean
+        std_dev = width / 6 if self.std_dev is None else self.std_dev
+        if dist == 'normal':
+            return stats.truncnorm.ppf(u, (lo - mean) / std_dev, (hi - mean) / std_dev, loc=mean, scale=std_dev)
+        if dist == 'lognormal':
+            # Parameters of the underlying normal, matching the mean and standard deviation of the input itself
+            sigma = np.sqrt(np.log(1 + (std_dev / mean) ** 2))
+            mu = np.log(mean) - sigma ** 2 / 2
+            f_lo, f_hi = (stats.norm.cdf((np.log(v) - mu) / sigma) if v > 0 else 0.0 for v in (lo, hi))
+            return np.clip(np.exp(mu + sigma * stats.norm.ppf(f_lo + u * (f_hi - f_lo))), lo, hi)
+        raise ValueError(f"Unknown distribution {dist}; supported: {list(DISTRIBUTIONS)}")
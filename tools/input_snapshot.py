@@ -0,0 +1,119 @@
+import hashlib
+import pickle
+from pathlib import Path
+
+from tools.input_catalog import _index_cache, catalog_index
+from tools.input_tree import InputTree
+from tools.result_cache import write_atomic
+
+
+_INPUT_DATA = Path(__file__).resolve().parents[1] / 'input_data'
+
+# Snapshot file, kept in the input_data directory it was built from
+_SNAPSHOT = '.catalog_snapshot'
+
+# Bumped whenever the layout of the snapshot (or of what it holds) changes
+_FORMAT = 3
+
+# First word of the plain-text header line preceding the pickled payload
+_MAGIC = b'catalog-snapshot'
+
+
+def tree_hash(root) -> str:
+    """SHA-256 of the paths and contents of every json file below an input_data directory."""
+    root = Path(root)
+    h = hashlib.sha256()
+    for p in sorted(root.rglob('*.json')):
+        h.update(p.relative_to(root).as_posix().encode())
+        h.update(p.read_bytes())
+    return h.hexdigest()
+
+
+def snapshot_path(root) -> Path:
+    return Path(root) / _SNAPSHOT
+
+
+def write_snapshot(root=_INPUT_DATA, path=None) -> Path:
+    """
+    Parses an input_data directory and saves the parsed tree, with its catalog index (see tools.input_catalog), as a
+    single binary snapshot keyed by the content hash of the json files.
+
+    Parameters
+    ----------
+    root: str or Path
+        Location of the input_data directory.
+
+    path: str or Path, optional
+        Snapshot file. Defaults to a file in root.
+
+    Returns
+    -------
+    path: Path
+        Location of the written snapshot.
+    """
+    root = Path(root)
+    path = Path(path) if path is not None else snapshot_path(root)
+    digest = tree_hash(root)
+    _save(InputTree(root), digest, path)
+    return path
+
+
+def _header(digest: str) -> bytes:
+    return b'%s %d %s\n' % (_MAGIC, _FORMAT, digest.encode())
+
+
+def _save(tree: InputTree, digest: str, path: Path):
+    # The header holds the format and source hash, so readers can reject a stale snapshot without unpickling it
+    payload = pickle.dumps({'data': tree.data, 'index': catalog_index(tree)}, protocol=pickle.HIGHEST_PROTOCOL)
+    write_atomic(path, _header(digest) + payload)
+
+
+def read_snapshot(root=_INPUT_DATA, path=None, digest=None):
+    """
+    Returns the tree held in the snapshot of an input_data directory, or None if there is no readable snapshot or the
+    json files changed since it was written (digest: their tree_hash, if already computed). The payload is only
+    unpickled once the plain-text header matches the format and the hash of the json files.
+    """
+    root = Path(root)
+    path = Path(path) if path is not None else snapshot_path(root)
+    digest = digest if digest is not None else tree_hash(root)
+    try:
+        with open(path, 'rb') as f:
+            if f.readline() != _header(digest):
+                return None
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    tree = InputTree(root, snapshot['data'])
+    _index_cache[tree] = snapshot['index']
+    return tree
+
+
+def load_tree(root=_INPUT_DATA, path=None) -> InputTree:
+    """
+    Returns the parsed tree of an input_data directory from its snapshot. A missing or outdated snapshot is rebuilt
+    from the json files (and left as is if it cannot be written, e.g. in a read-only checkout).
+    """
+    root = Path(root)
+    path = Path(path) if path is not None else snapshot_path(root)
+    digest = tree_hash(root)
+    tree = read_snapshot(root, path, digest)
+    if tree is None:
+        tree = InputTree(root)
+        try:
+            _save(tree, digest, path)
+        except OSError:
+            pass
+    return tree
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Snapshot the parsed input_data catalog into one binary file')
+    parser.add_argument('--root', default=str(_INPUT_DATA))
+    parser.add_argument('--out', default=None)
+
+    args = parser.parse_args()
+    out = write_snapshot(args.root, args.out)
+    print(f'Wrote {out} ({out.stat().st_size} bytes, source hash {tree_hash(args.root)[:12]})')
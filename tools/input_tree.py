@@ -0,0 +1,174 @@
+import json
+from pathlib import Path, PurePosixPath
+
+from tools.dict_tools import from_dict
+from tools.json_tools import _strip_comments, objects_from_dicts_gen
+
+
+def _load_json_text(text):
+    """
+    Parses json text, retrying with comment lines (starting with '//' or '#') removed if the first attempt fails.
+
+    Parameters
+    ----------
+    text: str
+        Contents of a json file.
+
+    Returns
+    -------
+    Parsed data with any file comments removed, or None if the text cannot be parsed.
+    """
+    try:
+        return json.loads(text, object_hook=_strip_comments)
+    except ValueError:
+        lines = [ln for ln in text.splitlines() if not ln.strip().startswith(('//', '#'))]
+        try:
+            return json.loads('\n'.join(lines), object_hook=_strip_comments)
+        except ValueError:
+            return None
+
+
+# Trees parsed by InputTree.load [root: (tree signature, InputTree)]
+_tree_cache = {}
+
+
+def _tree_signature(root: Path) -> tuple:
+    return tuple(sorted((str(p.relative_to(root)), p.stat().st_mtime_ns, p.stat().st_size)
+                        for p in root.rglob('*.json')))
+
+
+def _parse_dir(root, prefix=PurePosixPath()):
+    """Parses every json file below root, preserving directory iteration order."""
+    data = {}
+    for entry in Path(root).iterdir():
+        rel = prefix / entry.name
+        if entry.is_dir():
+            data.update(_parse_dir(entry, rel))
+        elif entry.suffix.lower() == '.json':
+            parsed = _load_json_text(entry.read_text())
+            if parsed is not None:
+                data[str(rel)] = parsed
+    return data
+
+
+class InputTree:
+
+    def __init__(self, root, data=None):
+        """
+        Initializes an in-memory copy of an input_data directory. Every json file is parsed once and held as a dict
+        keyed by its path relative to root, so that scenarios can be built (and re-built with sampled values) without
+        touching the disk again.
+
+        Parameters
+        ----------
+        root: str or Path
+            Location of the input_data directory.
+
+        data: dict, optional
+            Already parsed data [relative path: parsed json]. If not supplied, all json files below root are parsed.
+        """
+
+        self.root = Path(root)
+        self.data = _parse_dir(self.root) if data is None else data
+
+    @classmethod
+    def load(cls, root) -> "InputTree":
+        """
+        Returns the parsed tree of an input_data directory. Trees are cached and only re-parsed when a json file below
+        root is added, removed or modified, so building several scenarios (e.g. one per level) parses each file once.
+        A new process reads the tree from the binary snapshot of root (see tools.input_snapshot) when its content hash
+        matches the json files, and rebuilds the snapshot otherwise. The returned tree is shared: replace its data
+        through copy rather than modifying it in place.
+        """
+        from tools.input_snapshot import load_tree
+
+        root = Path(root).resolve()
+        sig = _tree_signature(root)
+        cached = _tree_cache.get(root)
+        if cached is None or cached[0] != sig:
+            cached = (sig, load_tree(root))
+            _tree_cache[root] = cached
+        return cached[1]
+
+    def copy(self, data=None) -> "InputTree":
+        """Creates a new tree for the same root, optionally holding different parsed data."""
+
+        return InputTree(self.root, dict(self.data) if data is None else data)
+
+    def get(self, rel):
+        """Returns the parsed data of a single file, given its path relative to the tree root."""
+
+        return self.data[str(PurePosixPath(rel))]
+
+    def listdir(self, rel_dir):
+        """Returns relative paths of the json files located directly within a directory of the tree."""
+
+        parent = PurePosixPath(rel_dir)
+        return [k for k in self.data if PurePosixPath(k).parent == parent]
+
+    def records(self, rel_dir):
+        """Returns the parsed data of every json file located directly within a directory of the tree."""
+
+        return [self.data[k] for k in self.listdir(rel_dir)]
+
+    def object(self, rel, clazz, level='base'):
+        """
+        Creates an instance of a class from a file in the tree. In-memory counterpart of json_tools.object_from_json.
+
+        Parameters
+        ----------
+        rel: str
+            Path of the file relative to the tree root.
+
+        clazz: class
+            Class name for object to be created
+
+        level: str or sequence of str
+            For nested json data, specifies which key in nested dict to use for attribute value. With several levels,
+            attributes differing between them hold one array entry per level (see tools.dict_tools.from_dict).
+
+        Returns
+        -------
+        Instance of object of specified class. The parsed file data is kept in the object's raw attribute, which
+        identifies the file an object was built from (see tools.sampling_plan).
+        """
+
+        data = self.get(rel)
+        obj = from_dict(clazz, data, level)
+        obj.raw = data
+        return obj
+
+    def objects(self, rel_dir, clazz, level='base'):
+        """
+        Creates instances of a class for each file within a directory of the tree. In-memory counterpart of
+        json_tools.objects_from_dir.
+
+        Parameters
+        ----------
+        rel_dir: str
+            Path of the directory relative to the tree root.
+
+        clazz: class
+            Class name for instances to be created
+
+        level: str or sequence of str
+            For nested json data, specifies which key in nested dict to use for attribute value (see object).
+
+        Returns
+        -------
+        Dictionary of instances of the specified class.
+        """
+
+        objects = {}
+        for rel in self.listdir(rel_dir):
+            obj = self.object(rel, clazz, level)
+            objects[obj.name] = obj
+        return objects
+
+    def objects_gen(self, rel_dir, clazz):
+        """
+        Creates generic objects of a class (without calling its __init__) for each file within a directory of the
+        tree. In-memory counterpart of json_tools.objects_from_dir_gen.
+        """
+
+        return objects_from_dicts_gen(self.records(rel_dir), clazz)
@@ -1,5 +1,5 @@
 import json
-import jsonpickle
+from copy import deepcopy
 from pathlib import Path
 
 from tools.dict_tools import from_dict
@@ -23,6 +23,43 @@ def _strip_comments(d):
     return {k: v for k, v in d.items() if not k.startswith("#")}
 
 
+def _attrs(data) -> dict:
+    """
+    Attributes of a generic object: the items of data, with dict and list values copied so that objects never share
+    containers with the parsed data (which InputTree.load caches process-wide) or with each other.
+    """
+    return {k: deepcopy(v) if isinstance(v, (dict, list)) else v for k, v in data.items()}
+
+
+def object_from_dict_gen(data, clazz):
+    """
+    Creates a generic object of a specified class with attributes specified in a dict.
+
+    Parameters
+    ----------
+    data: dict
+        Attribute names and values of the object
+
+    clazz: class
+        Class name for object to be created
+
+    Returns
+    -------
+    An object with the specified class.
+
+    Notes
+    _____
+    As object_from_json_gen, this function does NOT call the specified class's __init__ method: the instance is
+    created with clazz.__new__ and every item of data becomes an attribute. Nested dicts and lists are copied, as
+    jsonpickle decoded them into fresh containers.
+
+    """
+
+    obj = clazz.__new__(clazz)
+    obj.__dict__.update(_attrs(data))
+    return obj
+
+
 def object_from_json_gen(fpath, clazz):
     """
     Creates a generic object of a specified class with attributes specified in a json file.
@@ -43,22 +80,43 @@ def object_from_json_gen(fpath, clazz):
     _____
     This function does NOT call the specified class's __init__ method and therefore does NOT create an error
     if a required attribute is missing. Additionally, this function allows addition of attributes that are NOT
-    attributes created by the __init__ method. The object has access to specified class's methods via specifying the
-    "py/object" attribute as the specified class.
+    attributes created by the __init__ method. The object has access to specified class's methods as an instance of
+    the specified class (see object_from_dict_gen).
 
     """
 
     # Open json file and load data as python dictionary with comments removed.
-    # Specify class for object to be created.
-    # Convert dict containing class back to json and create Python object via jsonpickle.
-
     with open(fpath, "r") as f:
         data = json.load(f, object_hook=_strip_comments)
-    data["py/object"] = clazz.__module__ + "." + clazz.__name__
-    dataj = json.dumps(data)
-    obj = jsonpickle.decode(dataj)
 
-    return obj
+    return object_from_dict_gen(data, clazz)
+
+
+def objects_from_dicts_gen(records, clazz):
+    """
+    Creates generic objects of a specified class for each of a batch of dicts (e.g. parsed json files).
+
+    Parameters
+    ----------
+    records: iterable of dict
+        Attributes of each object, including its name
+
+    clazz: class
+        Class name for objects to be created
+
+    Returns
+    -------
+
+    Dictionary of objects with the specified class [name: object].
+
+    """
+    new = clazz.__new__
+    objects = {}
+    for data in records:
+        obj = new(clazz)
+        obj.__dict__.update(_attrs(data))
+        objects[obj.name] = obj
+    return objects
 
 
 def objects_from_dir_gen(location, clazz):
@@ -79,13 +137,11 @@ def objects_from_dir_gen(location, clazz):
     Dictionary of objects with the specified class.
 
     """
-    objects = {}
-    entries = Path(location)
-    for entry in entries.iterdir():
-        obj = object_from_json_gen(entry, clazz)
-        name = obj.name
-        objects[name] = obj
-    return objects
+    records = []
+    for entry in Path(location).iterdir():
+        with open(entry, "r") as f:
+            records.append(json.load(f, object_hook=_strip_comments))
+    return objects_from_dicts_gen(records, clazz)
 
 
 def object_from_json(fpath, clazz, level='base'):
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import qmc, t as student_t
+
+from tools.input_tree import InputTree
+from tools.sampling_plan import compile_plan, read_correlations
+
+
+# Helpers shared by the Monte Carlo run (tools.monte_carlo), the paired join method comparison (tools.mc_compare)
+# and the sensitivity analyses (tools.sensitivity).
+
+# The project's input_data directory
+INPUT_DATA = Path(__file__).resolve().parents[1] / 'input_data'
+
+# Draws are evaluated in fixed-size blocks. Each block samples from its own random stream, spawned from the run's
+# seed by block index, so results do not depend on how blocks are distributed across worker processes.
+BLOCK_SIZE = 1024
+
+# Samplers filling a block's unit-cube matrix. 'lhs' and 'sobol' draw an independently seeded (scrambled) design per
+# block, so block means are independent estimates of the mean and give a valid confidence interval for QMC too.
+# Sobol points are balanced only for power-of-2 block sizes.
+SAMPLERS = ('random', 'lhs', 'sobol')
+
+# Fewest blocks whose means are used to estimate the stopping confidence interval
+_MIN_BLOCKS = 4
+
+# Scenario name -> module providing create_hx
+SCENARIO_MAP = {
+    'mphx_sabic': 'analyses.iterations.mphx_sabic',
+    'mphx_oct24': 'analyses.iterations.mphx_oct24',
+}
+
+
+def default_tree() -> InputTree:
+    """Parsed tree of the project's input_data directory (see InputTree.load)."""
+    return InputTree.load(INPUT_DATA)
+
+
+def block_rng(entropy: int, block: int) -> np.random.Generator:
+    """Independent random stream for one block of draws, spawned from the run's seed."""
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(block,)))
+
+
+def unit_samples(sampler: str, rng: np.random.Generator, n: int, d: int) -> np.ndarray:
+    """Draw n points in the d-dimensional unit cube with the given sampler."""
+    if sampler == 'random' or d == 0:
+        return rng.random((n, d))
+    if sampler == 'lhs':
+        return qmc.LatinHypercube(d, seed=rng).random(n)
+    if sampler == 'sobol':
+        return qmc.Sobol(d, scramble=True, seed=rng).random(n)
+    raise ValueError(f"Unknown sampler {sampler}; supported: {list(SAMPLERS)}")
+
+
+def ci_halfwidth(means: list, confidence: float) -> float:
+    """Half-width of the Student-t confidence interval for the mean, given independent block means."""
+    if len(means) < max(_MIN_BLOCKS, 2):
+        return float('inf')
+    return float(student_t.ppf(0.5 + confidence / 2, len(means) - 1) * np.std(means, ddof=1) / np.sqrt(len(means)))
+
+
+def build_scenario(scenario_name: str, join_method: str, level: str, tree: InputTree, distribution: str = 'uniform',
+                   correlations: bool = True):
+    """Build a scenario's objects from a parsed input tree and bind the tree's sampling plan to them.
+
+    With correlations, the rank correlations declared in the tree (see `tools.sampling_plan.read_correlations`) are
+    imposed on the plan.
+    """
+    create_hx = getattr(importlib.import_module(SCENARIO_MAP[scenario_name]), 'create_hx')
+    model_hx, mfg_process, over, fac = create_hx(join_method=join_method, level=level, inputs=tree)
+    compiled = compile_plan(tree, level, distribution)
+    plan = compiled.bind(tree, model_hx, mfg_process, over, fac)
+    if correlations:
+        pairs = read_correlations(tree)
+        # Uncertain inputs of a declared pair that the scenario does not use; correlate ignores their pairs
+        unbound = sorted({p for a, b, _ in pairs for p in (a, b) if p in compiled.paths and p not in plan.paths})
+        if unbound:
+            warnings.warn(f"Correlations of inputs not used by scenario {scenario_name} ({join_method}) are ignored: "
+                          f"{', '.join(unbound)}")
+        plan = plan.correlate(pairs)
+    return (model_hx, mfg_process, over, fac), plan
+
+
+def print_progress(completed: int, total: int, bar_len: int = 40):
+    """Print a simple progress bar to the terminal (overwrites the same line)."""
+    if total <= 0:
+        return
+    completed = max(0, min(completed, total))
+    frac = completed / total
+    filled = int(round(frac * bar_len))
+    bar = '#' * filled + '-' * (bar_len - filled)
+    # \r to overwrite line; flush to ensure immediate update
+    sys.stdout.write(f"\rProgress: |{bar}| {completed}/{total} sims")
+    sys.stdout.flush()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy.stats import t as student_t
+
+from tools.mc_common import (BLOCK_SIZE, SAMPLERS, SCENARIO_MAP, block_rng, build_scenario, ci_halfwidth,
+                             default_tree, print_progress, unit_samples)
+from tools.mc_stats import RunningStats, REPORT_QUANTILES
+from tools.sampling_plan import SamplingPlan, read_correlations
+
+
+def compare_join_methods(scenario_name: str, join_methods: List[str], ann_prod_vol: int, n_sim: int,
+                         level: str = "base", seed: int = None, sampler: str = 'random', confidence: float = 0.95,
+                         block_size: int = BLOCK_SIZE, distribution: str = 'uniform',
+                         correlations: bool = True) -> pd.DataFrame:
+    """Paired Monte Carlo comparison of join methods using common random numbers.
+
+    Every join method's scenario is built from the same parsed input tree. One parameter matrix is drawn per block
+    over the union of the methods' uncertain inputs, so inputs the methods share (machines, salary, cycle times of
+    common steps, ...) take identical values in each draw and only the method-specific inputs differ. The cost
+    difference to the first (reference) method is then computed per draw, and its spread reflects the methods'
+    real difference rather than independent sampling noise.
+
+    Args:
+        scenario_name: 'mphx_sabic' or 'mphx_oct24'
+        join_methods: join methods passed to create_hx; the first is the reference
+        ann_prod_vol: annual production volume used in Scenario
+        n_sim: number of paired draws
+        seed: seed for the run's SeedSequence; None draws fresh entropy
+        sampler: 'random', 'lhs' or 'sobol'
+        confidence: confidence level of the intervals
+        block_size: draws per block; with 'lhs' or 'sobol' the intervals come from the spread of block means
+        distribution: distribution of the inputs that do not declare one
+        correlations: impose the declared rank correlations between inputs
+
+    Returns:
+        pd.DataFrame with one row per method other than the reference: mean total unit cost of both ('Method_mean',
+        'Reference_mean'), the per-draw difference Method - Reference ('Diff_mean', 'Diff_std', confidence interval
+        'Diff_ci_low'/'Diff_ci_high' of the mean difference and quantiles 'Diff_p05', ...), 'P_cheaper' (fraction of
+        draws in which the method is cheaper than the reference) and 'VRF', the variance of the difference under
+        independent runs divided by its paired variance (how many times fewer draws pairing needs).
+    """
+    if scenario_name not in SCENARIO_MAP:
+        raise ValueError(f"Unknown scenario_name {scenario_name}; supported: {list(SCENARIO_MAP.keys())}")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler {sampler}; supported: {list(SAMPLERS)}")
+    if len(join_methods) < 2:
+        raise ValueError("At least two join methods are needed for a comparison")
+    from analyses.cost_batch import calc_cost_batch
+    from pbcm.cost_items.Prepared_Process import prepare_processes
+
+    tree = default_tree()
+    built = [build_scenario(scenario_name, jm, level, tree, distribution, correlations=False) for jm in join_methods]
+
+    # Shared plan over the union of the methods' parameters; each method reads its own columns
+    entries = {}
+    for _, plan in built:
+        for e in plan.entries:
+            entries.setdefault(e.path, e)
+    shared = SamplingPlan(list(entries.values()))
+    if correlations:
+        shared = shared.correlate(read_correlations(tree))
+    columns = [[shared.index(p) for p in plan.paths] for _, plan in built]
+
+    entropy = np.random.SeedSequence(seed).entropy
+    totals = [RunningStats() for _ in join_methods]
+    diffs = [RunningStats() for _ in join_methods[1:]]
+    cheaper = np.zeros(len(join_methods) - 1, dtype=np.int64)
+    block_means = [[] for _ in join_methods[1:]]
+
+    for b, start in enumerate(range(0, n_sim, block_size)):
+        n = min(start + block_size, n_sim) - start
+        values = shared.to_values(unit_samples(sampler, block_rng(entropy, b), n, shared.n_dims))
+        cost = []
+        for ((model_hx, mfg_process, over, fac), plan), cols in zip(built, columns):
+            plan.apply(values[:, cols])
+            batch = calc_cost_batch(ann_prod_vol, prepare_processes(mfg_process), model_hx, over, fac)
+            cost.append(np.broadcast_to(batch.cat_total('total'), (n,)))
+        for i, c in enumerate(cost):
+            totals[i].update_batch(c)
+        for i, c in enumerate(cost[1:]):
+            d = c - cost[0]
+            diffs[i].update_batch(d)
+            cheaper[i] += int(np.count_nonzero(d < 0))
+            block_means[i].append(float(d.mean()))
+        print_progress(start + n, n_sim)
+    print()
+
+    rows = []
+    for i, jm in enumerate(join_methods[1:]):
+        d = diffs[i]
+        if sampler == 'random':
+            half = student_t.ppf(0.5 + confidence / 2, d.n - 1) * d.std / np.sqrt(d.n)
+        else:
+            half = ci_halfwidth(block_means[i], confidence)
+        row = {'Method': jm, 'Reference': join_methods[0], 'Method_mean': totals[i + 1].mean,
+               'Reference_mean': totals[0].mean, 'Diff_mean': d.mean, 'Diff_std': d.std,
+               'Diff_ci_low': d.mean - half, 'Diff_ci_high': d.mean + half}
+        row.update({f"Diff_{k}": d.quantile(q) for k, q in REPORT_QUANTILES.items()})
+        row.update({'P_cheaper': cheaper[i] / d.n, 'VRF': (totals[0].var + totals[i + 1].var) / d.var, 'n': d.n})
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Paired Monte Carlo comparison of join methods')
+    parser.add_argument('--scenario', choices=list(SCENARIO_MAP), default='mphx_sabic')
+    parser.add_argument('--join_methods', nargs='+', default=['Laser Welding', 'Gluing'])
+    parser.add_argument('--ann_prod_vol', type=int, default=2074)
+    parser.add_argument('--n_sim', type=int, default=1000)
+    parser.add_argument('--level', default='base')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--sampler', choices=list(SAMPLERS), default='random')
+
+    args = parser.parse_args()
+    res = compare_join_methods(args.scenario, args.join_methods, args.ann_prod_vol, args.n_sim, level=args.level,
+                               seed=args.seed, sampler=args.sampler)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(res)
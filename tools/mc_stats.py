@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+
+# Per-process cost keys (as in ProcessStep.proc_cost) and the column names used in Monte Carlo summaries
+COST_METRICS = {
+    'material': 'Material',
+    'equip': 'Equipment',
+    'labor': 'Labor',
+    'fac': 'Facility',
+    'util': 'Utilities',
+    'consume': 'Consumables',
+    'overhead': 'Overhead',
+    'total': 'Total',
+}
+
+# Quantiles reported alongside mean/std/min/max
+REPORT_QUANTILES = {'p05': 0.05, 'p50': 0.50, 'p95': 0.95}
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style log-spaced buckets).
+
+    Values are counted in buckets whose bounds grow geometrically by gamma = (1 + rel_acc) / (1 - rel_acc), so any
+    quantile is returned within a relative error of rel_acc. Memory depends on the range of the values, not on how
+    many values were added, and merging two sketches simply adds bucket counts (exact and order-independent).
+    """
+
+    def __init__(self, rel_acc: float = 0.005):
+        self.rel_acc = rel_acc
+        self.gamma = (1 + rel_acc) / (1 - rel_acc)
+        self._log_gamma = math.log(self.gamma)
+        self.pos: Dict[int, int] = {}
+        self.neg: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _key(self, x: float) -> int:
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, x: float, count: int = 1):
+        if x > 0:
+            k = self._key(x)
+            self.pos[k] = self.pos.get(k, 0) + count
+        elif x < 0:
+            k = self._key(-x)
+            self.neg[k] = self.neg.get(k, 0) + count
+        else:
+            self.zero += count
+        self.count += count
+
+    def add_batch(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        for store, part in ((self.pos, values[values > 0]), (self.neg, -values[values < 0])):
+            if part.size:
+                keys, counts = np.unique(np.ceil(np.log(part) / self._log_gamma).astype(np.int64), return_counts=True)
+                for k, c in zip(keys.tolist(), counts.tolist()):
+                    store[k] = store.get(k, 0) + c
+        self.zero += int(np.count_nonzero(values == 0))
+        self.count += values.size
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge quantile sketches with different relative accuracy")
+        for store, other_store in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, c in other_store.items():
+                store[k] = store.get(k, 0) + c
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return self._value(k)
+        # Rounding in rank can step past the last bucket; fall back to the largest value
+        if self.pos:
+            return self._value(max(self.pos))
+        return 0.0 if self.zero else -self._value(min(self.neg))
+
+
+class RunningStats:
+    """Online count, mean, variance (Welford), min, max and quantile sketch of a stream of values."""
+
+    def __init__(self, rel_acc: float = 0.005):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(rel_acc)
+
+    def update(self, x: float):
+        """Add one value in O(1) time and memory."""
+        x = float(x)
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        self.sketch.add(x)
+
+    def update_batch(self, values: Iterable[float]):
+        """Add an array of values (equivalent to merging the statistics of the batch)."""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        batch = RunningStats(self.sketch.rel_acc)
+        batch.n = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        batch.sketch.add_batch(values)
+        self.merge(batch)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine with the statistics of another stream (Chan et al. parallel update)."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+        else:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def var(self) -> float:
+        """Sample variance (ddof=1), matching pandas' default."""
+        return self.m2 / (self.n - 1) if self.n > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var) if self.n > 1 else float('nan')
+
+    def quantile(self, q: float) -> float:
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+
+
+class RunningCovariance:
+    """Online count, means, variances and covariance of a stream of (x, y) pairs (Welford/Chan, mergeable)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def update_batch(self, x: Iterable[float], y: Iterable[float]):
+        """Add arrays of paired values (equivalent to merging the statistics of the batch)."""
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if x.size == 0:
+            return
+        batch = RunningCovariance()
+        batch.n = x.size
+        batch.mean_x, batch.mean_y = float(x.mean()), float(y.mean())
+        dx, dy = x - batch.mean_x, y - batch.mean_y
+        batch.m2_x, batch.m2_y, batch.c_xy = float(dx @ dx), float(dy @ dy), float(dx @ dy)
+        self.merge(batch)
+
+    def merge(self, other: "RunningCovariance") -> "RunningCovariance":
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean_x, self.mean_y = other.n, other.mean_x, other.mean_y
+            self.m2_x, self.m2_y, self.c_xy = other.m2_x, other.m2_y, other.c_xy
+            return self
+        n = self.n + other.n
+        dx, dy = other.mean_x - self.mean_x, other.mean_y - self.mean_y
+        f = self.n * other.n / n
+        self.m2_x += other.m2_x + dx * dx * f
+        self.m2_y += other.m2_y + dy * dy * f
+        self.c_xy += other.c_xy + dx * dy * f
+        self.mean_x += dx * other.n / n
+        self.mean_y += dy * other.n / n
+        self.n = n
+        return self
+
+
+class CostAccumulator:
+    """Streaming summary of Monte Carlo cost draws per (process, cost category).
+
+    Each draw is added from the per-process cost dicts produced by calc_cost; a 'Total' process holding the sum over
+    all process steps is tracked alongside, which also yields the component-level statistics. Accumulators built from
+    separate shards or runs combine with `merge`.
+
+    Variance-reduced estimates of the means are fed separately with `update_units`: one value per independent unit
+    (a draw, or the mean of an antithetic pair of draws), optionally with a control variate whose
+    expectation `control_mean` is known. The summaries then report these estimates with their standard error and
+    variance-reduction factor relative to plain Monte Carlo.
+    """
+
+    def __init__(self, rel_acc: float = 0.005, control_mean: Mapping[str, Mapping[str, float]] = None):
+        self.rel_acc = rel_acc
+        self.stats: Dict[str, Dict[str, RunningStats]] = {}
+        self.units: Dict[str, Dict[str, RunningCovariance]] = {}
+        self.control_mean = control_mean
+
+    def _proc_stats(self, process: str) -> Dict[str, RunningStats]:
+        if process not in self.stats:
+            self.stats[process] = {m: RunningStats(self.rel_acc) for m in COST_METRICS}
+        return self.stats[process]
+
+    @property
+    def n(self) -> int:
+        return self.stats['Total']['total'].n if 'Total' in self.stats else 0
+
+    def update(self, proc_cost: Mapping[str, Mapping[str, float]]):
+        """Add one draw given as {process step name: {cost key: value}} (e.g. ProcessStep.proc_cost dicts)."""
+        totals = dict.fromkeys(COST_METRICS, 0.0)
+        for process, costs in proc_cost.items():
+            stats = self._proc_stats(process)
+            for m in COST_METRICS:
+                stats[m].update(costs[m])
+                totals[m] += costs[m]
+        stats = self._proc_stats('Total')
+        for m in COST_METRICS:
+            stats[m].update(totals[m])
+
+    def update_batch(self, proc_cost: Mapping[str, Mapping[str, np.ndarray]]):
+        """Add many draws at once, given as {process step name: {cost key: array of values}}."""
+        totals = dict.fromkeys(COST_METRICS, 0.0)
+        for process, costs in proc_cost.items():
+            stats = self._proc_stats(process)
+            for m in COST_METRICS:
+                stats[m].update_batch(costs[m])
+                totals[m] = totals[m] + np.asarray(costs[m], dtype=float)
+        stats = self._proc_stats('Total')
+        for m in COST_METRICS:
+            stats[m].update_batch(totals[m])
+
+    def update_units(self, proc_cost: Mapping[str, Mapping[str, np.ndarray]],
+                     proc_control: Mapping[str, Mapping[str, np.ndarray]] = None):
+        """
+        Add independent estimator units, given as {process step name: {cost key: array}} like `update_batch`.
+
+        proc_cost holds the cost of each unit (for antithetic pairs, the mean of the pair) and proc_control the
+        matching control variate values, whose expectations are in control_mean ({process: {cost key: value}},
+        'Total' included).
+        """
+        totals = dict.fromkeys(COST_METRICS, 0.0)
+        ctotals = dict.fromkeys(COST_METRICS, 0.0)
+        for process, costs in proc_cost.items():
+            units = self.units.setdefault(process, {m: RunningCovariance() for m in COST_METRICS})
+            for m in COST_METRICS:
+                c = 0.0 if proc_control is None else proc_control[process][m]
+                x = np.asarray(costs[m], dtype=float)
+                units[m].update_batch(x, np.broadcast_to(c, x.shape))
+                totals[m] = totals[m] + x
+                ctotals[m] = ctotals[m] + np.asarray(c, dtype=float)
+        units = self.units.setdefault('Total', {m: RunningCovariance() for m in COST_METRICS})
+        for m in COST_METRICS:
+            units[m].update_batch(totals[m], np.broadcast_to(ctotals[m], np.shape(totals[m])))
+
+    def merge(self, other: "CostAccumulator") -> "CostAccumulator":
+        for process, other_stats in other.stats.items():
+            stats = self._proc_stats(process)
+            for m in COST_METRICS:
+                stats[m].merge(other_stats[m])
+        for process, other_units in other.units.items():
+            units = self.units.setdefault(process, {m: RunningCovariance() for m in COST_METRICS})
+            for m in COST_METRICS:
+                units[m].merge(other_units[m])
+        if self.control_mean is None:
+            self.control_mean = other.control_mean
+        return self
+
+    def estimate(self, process: str, metric: str):
+        """
+        Estimate of the mean of one cost item.
+
+        Returns
+        -------
+        mean: float
+            Plain sample mean, or the antithetic / control-variate estimate if units were added.
+
+        se: float
+            Standard error of the estimate.
+
+        vrf: float
+            Variance-reduction factor: variance of the plain Monte Carlo mean of the same number of draws divided by
+            the variance of this estimate (1 for plain Monte Carlo).
+        """
+        s = self.stats[process][metric]
+        se_plain = s.std / math.sqrt(s.n) if s.n > 1 else float('nan')
+        u = self.units.get(process, {}).get(metric)
+        if u is None or u.n < 3:
+            return s.mean, se_plain, 1.0
+        mean, var = u.mean_x, u.m2_x / (u.n - 1)
+        if self.control_mean is not None and u.m2_y > 0:
+            beta = u.c_xy / u.m2_y
+            mean = u.mean_x - beta * (u.mean_y - self.control_mean[process][metric])
+            var = max(u.m2_x - beta * u.c_xy, 0.0) / (u.n - 2)
+        se = math.sqrt(var / u.n)
+        vrf = se_plain ** 2 / se ** 2 if se > 0 else (1.0 if se_plain == 0 else float('inf'))
+        return mean, se, vrf
+
+    def summary_frames(self):
+        """
+        Builds the Monte Carlo summary tables.
+
+        Returns
+        -------
+        grouped: DataFrame
+            One row per process (and 'Total'); columns '<Metric>_mean', '_std', '_min', '_max' for each cost category.
+
+        proc_total: DataFrame
+            Per-process total cost: 'Total_mean', 'Total_std', 'Total_min', 'Total_max', quantiles, and the standard
+            error 'Total_se' and variance-reduction factor 'Total_VRF' of the mean.
+
+        comp_stats: DataFrame
+            Per cost category ('Component') summed over processes: 'mean', 'std', 'min', 'max', quantiles, 'se' and
+            'VRF'.
+
+        Means are the estimates of `estimate` (variance-reduced if units were added); std, min, max and quantiles
+        describe the distribution of the draws.
+        """
+        processes = sorted(self.stats)
+
+        rows = []
+        for p in processes:
+            row = {'Process': p}
+            for m, col in COST_METRICS.items():
+                s = self.stats[p][m]
+                mean = self.estimate(p, m)[0]
+                row.update({f"{col}_mean": mean, f"{col}_std": s.std, f"{col}_min": s.min, f"{col}_max": s.max})
+            rows.append(row)
+        grouped = pd.DataFrame(rows)
+
+        rows = []
+        for p in processes:
+            s = self.stats[p]['total']
+            mean, se, vrf = self.estimate(p, 'total')
+            row = {'Process': p, 'Total_mean': mean, 'Total_std': s.std, 'Total_min': s.min, 'Total_max': s.max}
+            row.update({f"Total_{k}": s.quantile(q) for k, q in REPORT_QUANTILES.items()})
+            row.update({'Total_se': se, 'Total_VRF': vrf})
+            rows.append(row)
+        proc_total = pd.DataFrame(rows)
+
+        rows = []
+        for m, col in COST_METRICS.items():
+            s = self.stats['Total'][m]
+            mean, se, vrf = self.estimate('Total', m)
+            row = {'Component': col, 'mean': mean, 'std': s.std, 'min': s.min, 'max': s.max}
+            row.update({k: s.quantile(q) for k, q in REPORT_QUANTILES.items()})
+            row.update({'se': se, 'VRF': vrf})
+            rows.append(row)
+        comp_stats = pd.DataFrame(rows)
+
+        return grouped, proc_total, comp_stats
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import numpy.lib.format as npformat
+
+from tools.mc_stats import COST_METRICS, CostAccumulator
+
+
+MANIFEST = 'manifest.json'
+
+# Arrays of a draw store and their file names; the first axis of each is the draw
+_ARRAYS = {'inputs': 'inputs.npy', 'costs': 'costs.npy'}
+
+
+def _header_bytes(shape, dtype) -> bytes:
+    """Encoded .npy header for a C-ordered array (padded by numpy so the first axis can grow in place)."""
+    buf = io.BytesIO()
+    npformat.write_array_header_1_0(buf, {'descr': npformat.dtype_to_descr(np.dtype(dtype)),
+                                          'fortran_order': False, 'shape': tuple(shape)})
+    return buf.getvalue()
+
+
+def _write_manifest(path: Path, manifest: dict):
+    """Writes the manifest atomically, so a reader never sees a partially written file."""
+    tmp = path / (MANIFEST + '.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, path / MANIFEST)
+
+
+class DrawStore:
+
+    def __init__(self, path, parameters: List[str], processes: List[str], meta: dict = None):
+        """
+        Creates an on-disk store of raw Monte Carlo draws, written block by block as a run progresses.
+
+        The store is a directory holding one .npy file per array plus a JSON manifest:
+        - inputs.npy: sampled parameter matrix, shape (n_draws, n_parameters), columns ordered as `parameters`
+        - costs.npy: per-draw costs, shape (n_draws, n_processes, n_categories), ordered as `processes` and
+          CostBatch.COST_CATS
+        Rows are appended to the .npy files and their headers updated in place, so the files stay standard .npy
+        (loadable with np.load(mmap_mode='r')) without holding the draws in memory.
+
+        Parameters
+        ----------
+        path: str or Path
+            Directory of the store. Created if missing; existing store files are overwritten.
+
+        parameters: list
+            Sampling plan paths ("file:key") of the input columns.
+
+        processes: list
+            Process step names of the cost rows.
+
+        meta: dict, optional
+            Run settings recorded in the manifest (scenario, join method, seed, sampler, ...).
+        """
+        from pbcm.cost_functions.Cost_Batch import CostBatch
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.manifest = {
+            'version': 1,
+            'n_draws': 0,
+            'parameters': list(parameters),
+            'processes': list(processes),
+            'categories': list(CostBatch.COST_CATS),
+            'files': dict(_ARRAYS),
+            'meta': meta or {},
+        }
+        self._row_shape = {'inputs': (len(parameters),), 'costs': (len(processes), len(CostBatch.COST_CATS))}
+        for name, fname in _ARRAYS.items():
+            (self.path / fname).write_bytes(_header_bytes((0,) + self._row_shape[name], np.float64))
+        _write_manifest(self.path, self.manifest)
+
+    @classmethod
+    def open(cls, path, n_draws: int = None) -> "DrawStore":
+        """
+        Reopens an existing store for appending, e.g. to resume or extend a run.
+
+        Parameters
+        ----------
+        path: str or Path
+            Directory of the store.
+
+        n_draws: int, optional
+            Number of draws to keep. Rows beyond it (draws written after the checkpoint a run is resumed from) are
+            truncated. By default all recorded draws are kept.
+
+        Returns
+        -------
+        store: DrawStore
+        """
+        res = cls.__new__(cls)
+        res.path = Path(path)
+        res.manifest = json.loads((res.path / MANIFEST).read_text())
+        n_cats = len(res.manifest['categories'])
+        res._row_shape = {'inputs': (len(res.manifest['parameters']),),
+                          'costs': (len(res.manifest['processes']), n_cats)}
+        n = res.n_draws if n_draws is None else n_draws
+        if n > res.n_draws:
+            raise ValueError(f"Draw store {path} holds {res.n_draws} draws, cannot keep {n}")
+        for name, fname in _ARRAYS.items():
+            header = _header_bytes((n,) + res._row_shape[name], np.float64)
+            with open(res.path / fname, 'r+b') as f:
+                f.truncate(len(header) + n * int(np.prod(res._row_shape[name])) * 8)
+                f.write(header)
+        res.manifest['n_draws'] = n
+        _write_manifest(res.path, res.manifest)
+        return res
+
+    @property
+    def n_draws(self) -> int:
+        return self.manifest['n_draws']
+
+    def append(self, inputs: np.ndarray, costs: np.ndarray):
+        """
+        Appends a block of draws.
+
+        Parameters
+        ----------
+        inputs: ndarray
+            Sampled parameter values, shape (n, n_parameters).
+
+        costs: ndarray
+            Costs of the same draws, shape (n, n_processes, n_categories).
+        """
+        n = self.n_draws + len(inputs)
+        for name, arr in (('inputs', inputs), ('costs', costs)):
+            arr = np.ascontiguousarray(arr, dtype=np.float64)
+            if arr.shape[1:] != self._row_shape[name] or len(arr) != len(inputs):
+                raise ValueError(f"{name} block of shape {arr.shape} does not match the store")
+            header = _header_bytes((n,) + self._row_shape[name], np.float64)
+            with open(self.path / _ARRAYS[name], 'r+b') as f:
+                if len(header) != len(_header_bytes((0,) + self._row_shape[name], np.float64)):
+                    raise ValueError(f"Draw store {name} exceeds the size its .npy header can record")
+                f.seek(0, os.SEEK_END)
+                f.write(arr.tobytes())
+                f.seek(0)
+                f.write(header)
+        self.manifest['n_draws'] = n
+        _write_manifest(self.path, self.manifest)
+
+
+class DrawSet:
+
+    def __init__(self, path, mmap: bool = True):
+        """
+        Opens a draw store written by DrawStore (e.g. monte_carlo_run(..., store=path)).
+
+        Parameters
+        ----------
+        path: str or Path
+            Directory of the store.
+
+        mmap: bool
+            Memory-map the arrays (read-only) instead of loading them into memory.
+        """
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST).read_text())
+        n = self.manifest['n_draws']
+        mode = 'r' if mmap else None
+        # Rows past n_draws may belong to a block still being written; the manifest is updated last
+        self.inputs = np.load(self.path / self.manifest['files']['inputs'], mmap_mode=mode)[:n]
+        self.costs = np.load(self.path / self.manifest['files']['costs'], mmap_mode=mode)[:n]
+
+    @property
+    def n_draws(self) -> int:
+        return self.manifest['n_draws']
+
+    @property
+    def parameters(self) -> List[str]:
+        return self.manifest['parameters']
+
+    @property
+    def processes(self) -> List[str]:
+        return self.manifest['processes']
+
+    @property
+    def categories(self) -> List[str]:
+        return self.manifest['categories']
+
+    @property
+    def meta(self) -> dict:
+        return self.manifest['meta']
+
+    def param(self, path: str) -> np.ndarray:
+        """Sampled values of one input parameter ("file:key")."""
+        return self.inputs[:, self.parameters.index(path)]
+
+    def cost(self, process: str, category: str = 'total') -> np.ndarray:
+        """Per-draw cost of one process step and cost category (a key of ProcessStep.proc_cost)."""
+        return self.costs[:, self.processes.index(process), self.categories.index(category)]
+
+    def total(self, category: str = 'total') -> np.ndarray:
+        """Per-draw cost of one category summed over all process steps."""
+        return self.costs[:, :, self.categories.index(category)].sum(axis=1)
+
+    def accumulator(self, chunk: int = 65536) -> CostAccumulator:
+        """Re-summarizes the stored draws chunk by chunk (see CostAccumulator.summary_frames)."""
+        cats = [self.categories.index(m) for m in COST_METRICS]
+        acc = CostAccumulator()
+        for start in range(0, self.n_draws, chunk):
+            block = np.asarray(self.costs[start:start + chunk])
+            proc_cost: Dict[str, Dict[str, np.ndarray]] = {
+                p: {m: block[:, i, c] for m, c in zip(COST_METRICS, cats)} for i, p in enumerate(self.processes)}
+            acc.update_batch(proc_cost)
+        return acc
+
+
+def load_draws(path, mmap: bool = True) -> DrawSet:
+    """Opens a Monte Carlo draw store; arrays are memory-mapped unless mmap is False."""
+    return DrawSet(path, mmap)
@@ -1,217 +1,386 @@
 from __future__ import annotations
 
-import json
-import random
-import shutil
-import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any
-import importlib
-import os
+import pickle
 
+import numpy as np
 import pandas as pd
-import sys
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 from typing import Dict
 
+from tools.input_range import DISTRIBUTIONS
+from tools.input_tree import InputTree
+from tools.mc_common import (BLOCK_SIZE, INPUT_DATA, SAMPLERS, SCENARIO_MAP, block_rng, build_scenario,
+                             ci_halfwidth, default_tree, print_progress, unit_samples)
+from tools.mc_stats import CostAccumulator
+from tools.mc_store import DrawStore
+from tools.result_cache import write_atomic
+from pbcm.cost_functions.Cost_Batch import CostBatch
+from tools.sampling_plan import SamplingPlan
 
-def _sample_node(node: Any, level: str) -> Any:
-    """Recursively sample a JSON node.
 
-    If a dict contains numeric 'low' and 'high' keys, sample uniformly between them.
-    - If that dict also contains 'base', replace 'base' with the sampled value and return the dict.
-    - Otherwise return the sampled numeric value (replacing the dict itself).
-    """
-    if isinstance(node, dict):
-        # Detect range-like dict
-        if 'low' in node and 'high' in node and isinstance(node['low'], (int, float)) and isinstance(node['high'], (int, float)):
-            sampled = random.uniform(float(node['low']), float(node['high']))
-            # Prefer writing sampled value into the requested level if present
-            if level in node:
-                new = dict(node)
-                new[level] = sampled
-                return new
-            # Fallback: write into base if it exists
-            if 'base' in node:
-                new = dict(node)
-                new['base'] = sampled
-                return new
-            # Otherwise return scalar sampled value
-            return sampled
-        # Otherwise recurse through keys
-        return {k: _sample_node(v, level) for k, v in node.items()}
-    elif isinstance(node, list):
-        return [_sample_node(v, level) for v in node]
-    else:
-        return node
+# File holding the pickled run state within a checkpoint directory
+_CHECKPOINT = 'checkpoint.pkl'
+
+# Per-process state set up once by _init_worker (scenario objects and their bound sampling plan)
+_worker_state: Dict[str, Any] = {}
+
 
+def scenario_plan(scenario_name: str, join_method: str, level: str = "base", distribution: str = 'uniform',
+                  correlations: bool = True) -> SamplingPlan:
+    """Return the sampling plan of a scenario: the uncertain inputs that actually vary its cost (see `plan.summary()`)."""
+    tree = default_tree()
+    return build_scenario(scenario_name, join_method, level, tree, distribution, correlations)[1]
 
-def _collect_json_files(input_root: Path):
-    return list(input_root.rglob('*.json'))
 
+def _init_worker(scenario_name: str, join_method: str, level: str, input_root: Path, distribution: str = 'uniform',
+                 correlations: bool = True):
+    """Parse the input tree, build the scenario and bind its sampling plan once per process."""
+    tree = InputTree.load(input_root)
+    _worker_state['scenario'], _worker_state['plan'] = build_scenario(scenario_name, join_method, level, tree,
+                                                                      distribution, correlations)
 
-def monte_carlo_run(scenario_name: str, join_method: str, ann_prod_vol: int, n_sim: int, level: str = "base") -> pd.DataFrame:
+
+def _linear_control(ann_prod_vol: int):
+    """Linearized cost model of the worker's scenario, used as control variate (cached per production volume).
+
+    Each cost item is approximated as f(base) + sum_j g_j (x_j - base_j), with g_j the secant slope between
+    parameter j at its low and at its high value (one batched one-at-a-time evaluation). Secants rather than
+    derivatives keep the model meaningful across the model's step changes (machine counts are rounded up).
+
+    Returns:
+        base: base parameter values
+        linear: {process: {cost key: (f(base), slopes)}}
+        expected: {process: {cost key: expectation of the linear model}}, 'Total' included
+    """
+    from analyses.cost_batch import calc_cost_batch
+    from pbcm.cost_items.Prepared_Process import prepare_processes
+
+    cache = _worker_state.setdefault('linear', {})
+    if ann_prod_vol not in cache:
+        model_hx, mfg_process, over, fac = _worker_state['scenario']
+        plan = _worker_state['plan']
+        base, shift = plan.base, plan.expected - plan.base
+        plan.apply(plan.oat_matrix())
+        cost = calc_cost_batch(ann_prod_vol, prepare_processes(mfg_process), model_hx, over, fac)
+
+        linear, expected = {}, {'Total': dict.fromkeys(CostBatch.COST_CATS, 0.0)}
+        for k, v in cost.proc_cost.items():
+            linear[k], expected[k] = {}, {}
+            for m, y in v.items():
+                y = np.broadcast_to(y, (2 * plan.n_dims + 1,))
+                slopes = (y[2::2] - y[1::2]) / (plan.high - plan.low)
+                linear[k][m] = (float(y[0]), slopes)
+                expected[k][m] = float(y[0] + shift @ slopes)
+                expected['Total'][m] += expected[k][m]
+        cache[ann_prod_vol] = (base, linear, expected)
+    return cache[ann_prod_vol]
+
+
+def _run_block(block: int, start: int, stop: int, entropy: int, ann_prod_vol: int, sampler: str = 'random',
+               keep_draws: bool = False, antithetic: bool = False, control_variate: bool = False):
+    """Evaluate draws [start, stop) of a run and return their streaming cost summary.
+
+    With keep_draws the raw draws are returned too, as {'inputs': (n, n_dims), 'costs': (n, n_process, n_category),
+    'parameters': plan paths, 'processes': process step names}; otherwise None.
+
+    With antithetic, the second half of the block mirrors the unit-cube samples of the first half (1 - u), and each
+    pair of draws is one estimator unit. With control_variate, the linearized model of `_linear_control` is evaluated
+    on the same draws as control variate.
+    """
+    from analyses.cost_batch import calc_cost_batch
+    from pbcm.cost_items.Prepared_Process import prepare_processes
+
+    model_hx, mfg_process, over, fac = _worker_state['scenario']
+    plan = _worker_state['plan']
+    n = stop - start
+    control = _linear_control(ann_prod_vol) if control_variate else None
+
+    # Fill the block's parameter matrix in one call, write its columns onto the scenario objects and evaluate all
+    # draws with the vectorized cost kernel
+    rng = block_rng(entropy, block)
+    if antithetic:
+        u = unit_samples(sampler, rng, n // 2, plan.n_dims)
+        u = np.concatenate([u, 1 - u])
+    else:
+        u = unit_samples(sampler, rng, n, plan.n_dims)
+    values = plan.to_values(u)
+    plan.apply(values)
+    cost = calc_cost_batch(ann_prod_vol, prepare_processes(mfg_process), model_hx, over, fac)
+    proc_cost = {k: {m: np.broadcast_to(x, (n,)) for m, x in v.items()} for k, v in cost.proc_cost.items()}
+
+    acc = CostAccumulator(control_mean=None if control is None else control[2])
+    acc.update_batch(proc_cost)
+    if antithetic or control_variate:
+        def units(x):
+            return (x[:n // 2] + x[n // 2:]) / 2 if antithetic else x
+
+        proc_control = None
+        if control is not None:
+            base, linear = control[0], control[1]
+            proc_control = {k: {m: units(f0 + (values - base) @ g) for m, (f0, g) in v.items()}
+                            for k, v in linear.items()}
+        acc.update_units({k: {m: units(x) for m, x in v.items()} for k, v in proc_cost.items()}, proc_control)
+
+    draws = None
+    if keep_draws:
+        costs = np.stack([np.stack([v[c] for c in cost.COST_CATS], axis=-1) for v in proc_cost.values()], axis=1)
+        draws = {'inputs': values, 'costs': costs, 'parameters': plan.paths, 'processes': list(proc_cost)}
+    return acc, draws
+
+
+def monte_carlo_run(scenario_name: str, join_method: str, ann_prod_vol: int, n_sim: int, level: str = "base",
+                    seed: int = None, workers: int = 1, sampler: str = 'random', ci_target: float = None,
+                    confidence: float = 0.95, block_size: int = BLOCK_SIZE, store=None, checkpoint=None,
+                    checkpoint_every: int = 1, distribution: str = 'uniform',
+                    correlations: bool = True, antithetic: bool = False,
+                    control_variate: bool = False) -> pd.DataFrame:
     """Run Monte Carlo simulations and return summary DataFrame.
 
     Behavior:
-    - Loads all JSON files under the project's `input_data` directory.
-    - For each simulation, samples any JSON value that is a dict containing numeric 'low' and 'high' keys.
-      - If the dict also contains a 'base' key (common for price objects), the sampled value replaces 'base'.
-      - Otherwise the dict itself is replaced with the sampled numeric value.
-    - Writes the sampled input tree to a temporary input_data directory and runs the selected scenario's
-      `create_hx` function (from `analyses.iterations.mphx_sabic` or `mphx_oct24`) using that input.
-    - Runs the cost pipeline to produce a per-process cost DataFrame for each simulation.
-    - Returns a summary DataFrame with mean and std for each cost item grouped by Process.
+    - Parses all JSON files under the project's `input_data` directory once into an in-memory `InputTree` and
+      builds the selected scenario's objects from it with its `create_hx` function (from
+      `analyses.iterations.mphx_sabic` or `mphx_oct24`).
+    - Compiles a `SamplingPlan` of every JSON value that is a dict with numeric 'low' != 'high' and binds it to the
+      scenario objects. Constant leaves and inputs the scenario does not use are dropped.
+    - Each block of draws fills a (draws x parameters) matrix between each parameter's 'low' and 'high', following
+      the distribution the JSON leaf declares ('distribution' key, see `tools.input_range.DISTRIBUTIONS`) or
+      `distribution` otherwise, and the rank correlations declared in `input_data/uncertainty/correlations.json`
+      (Gaussian copula, unless `correlations` is False). The matrix is written onto the objects (replacing the
+      value read at `level`); all draws are then evaluated at once with `analyses.cost_batch.calc_cost_batch`.
+      Nothing is written to disk and no module is reloaded.
+    - Folds the per-process costs into a streaming `CostAccumulator` (Welford mean/variance, min/max and a
+      quantile sketch), so memory does not grow with n_sim.
+    - Returns summary DataFrames with mean, std, min and max for each cost item grouped by Process.
+
+    Draws are split into blocks of `block_size`; block b samples from a stream spawned from
+    `numpy.random.SeedSequence(seed)` with spawn key (b,). With `workers > 1` the blocks are sharded across a
+    `ProcessPoolExecutor` whose workers parse the inputs once in their initializer. Blocks are merged in order,
+    so for a given seed the output is bit-identical whatever the worker count.
+
+    With `sampler='lhs'` or `'sobol'` each block is a Latin hypercube or scrambled Sobol design (scipy.stats.qmc)
+    instead of independent uniform draws. If `ci_target` is given, the run stops after the first block at which the
+    confidence-interval half-width of the mean total unit cost, estimated from the spread of the block means, is at
+    most `ci_target`; n_sim is then the maximum number of draws. The stopping point does not depend on `workers`.
+
+    If `store` is a directory, the sampled parameter matrix and the per-draw, per-process costs are written there
+    as they are merged (see `tools.mc_store.DrawStore`); reopen them memory-mapped with `tools.mc_store.load_draws`.
+
+    Means can be estimated with variance reduction: `antithetic` pairs every draw with its mirror image in the unit
+    cube, and `control_variate` uses a linearized cost model (secant slopes between each input's low and high around
+    the base inputs), whose expectation is known, as control variate. Both can be combined. proc_total and
+    comp_stats report the standard error of each mean ('Total_se' / 'se') and the variance-reduction factor
+    achieved relative to plain Monte Carlo ('Total_VRF' / 'VRF'), i.e. how many times more plain draws would give
+    the same precision.
+
+    If `checkpoint` is a directory, the run state (seed, settings, merged statistics of the blocks done so far) is
+    saved there every `checkpoint_every` full blocks, on interruption and at the end. `resume_run` continues an
+    interrupted run from it and `extend_run` adds draws to a finished one; either gives the same result as a single
+    uninterrupted run.
 
     Args:
         scenario_name: 'mphx_sabic' or 'mphx_oct24'
         join_method: passed to create_hx
         ann_prod_vol: annual production volume used in Scenario
         n_sim: number of simulations
+        seed: seed for the run's SeedSequence; None draws fresh entropy
+        workers: number of worker processes (1 runs in the calling process)
+        sampler: 'random', 'lhs' or 'sobol'
+        ci_target: stop once the CI half-width of the mean total unit cost is at most this ($/unit); None runs n_sim
+        confidence: confidence level of the stopping interval
+        block_size: draws per block (the granularity of the stopping check); use a power of 2 with 'sobol'
+        store: directory to write the raw draws to; None keeps only the summaries
+        checkpoint: directory to save the run state to; None disables checkpoints
+        checkpoint_every: number of full blocks between checkpoints
+        distribution: distribution of the inputs that do not declare one ('uniform', 'triangular', 'pert', ...)
+        correlations: impose the declared rank correlations (False samples all inputs independently)
+        antithetic: pair each unit-cube sample u with 1 - u (needs even n_sim and block_size)
+        control_variate: correct the means with a linearized cost model of known expectation as control variate
 
     Returns:
         pd.DataFrame with columns like 'Process', '<Metric>_mean', '<Metric>_std'
     """
-    # Resolve repository paths based on this file's location
-    repo_root = Path(__file__).resolve().parents[1]
-    input_root = repo_root / 'input_data'
-    if not input_root.exists():
-        raise FileNotFoundError(f"input_data directory not found at expected location: {input_root}")
-
-    # Map scenario name to module path
-    scenario_map = {
-        'mphx_sabic': 'analyses.iterations.mphx_sabic',
-        'mphx_oct24': 'analyses.iterations.mphx_oct24',
-    }
-    if scenario_name not in scenario_map:
-        raise ValueError(f"Unknown scenario_name {scenario_name}; supported: {list(scenario_map.keys())}")
-
-    module_name = scenario_map[scenario_name]
-    scenario_module = importlib.import_module(module_name)
-    # Ensure fresh import to avoid any state caching
-    importlib.reload(scenario_module)
-
-    # Prepare temporary working tree: a workspace directory whose ../input_data will point to temp_input
-    tmp_root = Path(tempfile.mkdtemp(prefix='mc_mphx_'))
-    tmp_input = tmp_root / 'input_data'
-    tmp_workspace = tmp_root / 'workspace'
-    tmp_input.mkdir(parents=True)
-    tmp_workspace.mkdir(parents=True)
-
-    # Copy input tree structure to temp once (we'll overwrite files per simulation)
-    for src in _collect_json_files(input_root):
-        rel = src.relative_to(input_root)
-        dst = tmp_input / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dst)
-
-    all_sim_dfs = []
-
-    # We'll import the pipeline functions we need from the analyses module that live in repo
-    from analyses.Scenario import Scenario
-    from analyses.cost_output import calc_cost_obj, conv_cost_to_df
-
-    # For each simulation draw
-    for i in range(n_sim):
-        # Sample all JSON files and write to temp input
-        for src in _collect_json_files(input_root):
-            rel = src.relative_to(input_root)
-            dst = tmp_input / rel
-            with open(src, 'r') as f:
-                text = f.read()
-                try:
-                    data = json.loads(text)
-                except Exception:
-                    # Try stripping comment lines starting with // or #
-                    lines = [ln for ln in text.splitlines() if not ln.strip().startswith('//') and not ln.strip().startswith('#')]
-                    try:
-                        data = json.loads('\n'.join(lines))
-                    except Exception:
-                        # If still can't parse, copy the original file unchanged
-                        shutil.copy2(src, dst)
-                        continue
-            sampled = _sample_node(data, level)
-            # Write sampled JSON
-            with open(dst, 'w') as f:
-                json.dump(sampled, f, indent=2)
-
-        # Run model using the temporary workspace as CWD so that create_hx's '../input_data' resolves
-        # to our tmp_input directory
-        old_cwd = Path.cwd()
-        try:
-            os.chdir(tmp_workspace)
-            # reload module so that any internal caches referencing files are refreshed
-            scenario_module = importlib.reload(scenario_module)
-            # call create_hx with explicit level so sampled JSON 'base' fields are used
-            create_hx = getattr(scenario_module, 'create_hx')
-            model_hx, mfg_process, over, fac = create_hx(join_method=join_method, level=level)
-
-            # Build scenario and run cost pipeline
-            baseline = Scenario(ann_prod_vol, model_hx, mfg_process, over, fac)
-            cost_bd = calc_cost_obj(baseline)
-            df = conv_cost_to_df(mfg_process, cost_bd)
-            df['sim'] = i
-            all_sim_dfs.append(df)
-            # update progress bar after finishing this simulation
-            _print_progress(i+1, n_sim)
-        finally:
-            os.chdir(old_cwd)
-
-    # Clean up temporary tree
+    if not INPUT_DATA.exists():
+        raise FileNotFoundError(f"input_data directory not found at expected location: {INPUT_DATA}")
+
+    if scenario_name not in SCENARIO_MAP:
+        raise ValueError(f"Unknown scenario_name {scenario_name}; supported: {list(SCENARIO_MAP.keys())}")
+
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler {sampler}; supported: {list(SAMPLERS)}")
+
+    if antithetic and (n_sim % 2 or block_size % 2):
+        raise ValueError("Antithetic sampling needs an even n_sim and block_size")
+
+    settings = {'scenario_name': scenario_name, 'join_method': join_method, 'ann_prod_vol': ann_prod_vol,
+                'level': level, 'entropy': np.random.SeedSequence(seed).entropy, 'sampler': sampler,
+                'block_size': block_size, 'confidence': confidence, 'store': None if store is None else str(store),
+                'distribution': distribution, 'correlations': correlations, 'antithetic': antithetic,
+                'control_variate': control_variate}
+    return _run(settings, n_sim, ci_target, workers, checkpoint, checkpoint_every)
+
+
+# monte_carlo_run arguments that do not change its results
+_UNKEYED = ('workers', 'store', 'checkpoint', 'checkpoint_every')
+
+
+def cached_monte_carlo_run(cache, scenario_name: str, join_method: str, ann_prod_vol: int, n_sim: int,
+                           seed: int = None, **kwargs):
+    """monte_carlo_run through a tools.result_cache.ResultCache.
+
+    The summary frames are stored under a hash of the parsed input_data tree, the scenario, the run settings and the
+    cost model source, and returned from the cache when a run with the same key was done before. Unseeded runs are
+    not reproducible and always run. On a cache hit nothing is written to `store` or `checkpoint`.
+
+    Args:
+        cache: ResultCache holding the results
+        scenario_name, join_method, ann_prod_vol, n_sim, seed, kwargs: passed to monte_carlo_run
+
+    Returns:
+        the (proc_by_metric, proc_total, comp_stats) frames of monte_carlo_run
+    """
+    from tools.result_cache import scenario_key
+
+    def run():
+        return monte_carlo_run(scenario_name, join_method, ann_prod_vol, n_sim, seed=seed, **kwargs)
+
+    if seed is None:
+        return run()
+    tree = default_tree()
+    key = scenario_key(tree, scenario_name, run='monte_carlo_run', join_method=join_method,
+                       ann_prod_vol=ann_prod_vol, n_sim=n_sim, seed=seed,
+                       **{k: v for k, v in kwargs.items() if k not in _UNKEYED})
+    return cache.get_or_compute(key, run)
+
+
+def _save_checkpoint(checkpoint: Path, snapshot: bytes):
+    """Write a pickled run state atomically, so an interrupted write never replaces a good checkpoint."""
+    checkpoint = Path(checkpoint)
+    checkpoint.mkdir(parents=True, exist_ok=True)
+    write_atomic(checkpoint / _CHECKPOINT, snapshot)
+
+
+def _load_checkpoint(checkpoint: Path) -> dict:
+    with open(Path(checkpoint) / _CHECKPOINT, 'rb') as f:
+        return pickle.load(f)
+
+
+def _run(settings: dict, n_sim: int, ci_target: float, workers: int, checkpoint=None, checkpoint_every: int = 1,
+         state: dict = None):
+    """Evaluate blocks of a run in order, starting from a checkpointed state if given, and summarize them.
+
+    A state holds everything the remaining blocks depend on: the accumulator and block means of the first
+    `next_block` blocks, all of which are full. Each block draws from its own stream, so continuing from a state
+    reproduces the blocks (and merge order) of an uninterrupted run.
+    """
+    block_size, store = settings['block_size'], settings['store']
+    state = state or {'next_block': 0, 'acc': CostAccumulator(), 'block_means': []}
+    acc, block_means = state['acc'], state['block_means']
+
+    first = state['next_block']
+    blocks = [(b, start, min(start + block_size, n_sim))
+              for b, start in enumerate(range(0, n_sim, block_size)) if b >= first]
+    block_args = [[arg[i] for arg in blocks] for i in range(3)]
+    shared_args = [[settings[k]] * len(blocks) for k in ('entropy', 'ann_prod_vol', 'sampler')]
+    shared_args.append([store is not None] * len(blocks))
+    shared_args += [[settings.get(k, False)] * len(blocks) for k in ('antithetic', 'control_variate')]
+
+    # Draws written after the state was saved are dropped and evaluated again
+    draw_store = DrawStore.open(store, first * block_size) if store is not None and first > 0 else None
+
+    # Pickled state after the last full block. A trailing partial block is never part of it: extending the run
+    # evaluates that block again at full size, as an uninterrupted run of the larger size would.
+    snapshot = pickle.dumps(dict(state, settings=settings, n_sim=n_sim, ci_target=ci_target, done=False))
+
+    def merge_block(block, start, stop, result):
+        """Merge one block in order; return True once the stopping rule is met."""
+        nonlocal draw_store, snapshot
+        block_acc, draws = result
+        if draws is not None:
+            if draw_store is None:
+                meta = {k: v for k, v in settings.items() if k != 'store'}
+                draw_store = DrawStore(store, draws['parameters'], draws['processes'], meta)
+            draw_store.append(draws['inputs'], draws['costs'])
+        acc.merge(block_acc)
+        block_means.append(block_acc.stats['Total']['total'].mean)
+        print_progress(stop, n_sim)
+        if checkpoint is not None and stop - start == block_size:
+            snapshot = pickle.dumps({'settings': settings, 'n_sim': n_sim, 'ci_target': ci_target,
+                                     'next_block': block + 1, 'acc': acc, 'block_means': block_means, 'done': False})
+            if (block + 1) % checkpoint_every == 0:
+                _save_checkpoint(checkpoint, snapshot)
+        return ci_target is not None and ci_halfwidth(block_means, settings['confidence']) <= ci_target
+
+    initargs = (settings['scenario_name'], settings['join_method'], settings['level'], INPUT_DATA,
+                settings.get('distribution', 'uniform'), settings.get('correlations', True))
     try:
-        shutil.rmtree(tmp_root)
-    except Exception:
-        pass
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+            try:
+                # Futures are consumed in submission order, keeping the merge (and stopping point) independent of
+                # completion order. Blocks beyond the stopping point are cancelled.
+                futures = [executor.submit(_run_block, *args) for args in zip(*block_args, *shared_args)]
+                for (block, start, stop), future in zip(blocks, futures):
+                    if merge_block(block, start, stop, future.result()):
+                        break
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            _init_worker(*initargs)
+            for (block, start, stop), args in zip(blocks, zip(*block_args, *shared_args)):
+                if merge_block(block, start, stop, _run_block(*args)):
+                    break
+    except BaseException:
+        # Interrupted (error or Ctrl-C): keep the last full block so the run can be resumed from it
+        if checkpoint is not None:
+            _save_checkpoint(checkpoint, snapshot)
+        raise
+
+    if checkpoint is not None:
+        # Mark the run as complete; its final summary is kept alongside the state to extend it from
+        final = pickle.loads(snapshot)
+        final.update(done=True, final=acc, n_draws=acc.n)
+        _save_checkpoint(checkpoint, pickle.dumps(final))
 
     # ensure progress bar ends with newline
     print()
+    if ci_target is not None:
+        print(f"{acc.n} draws ({settings['sampler']}): CI half-width of mean total cost "
+              f"{ci_halfwidth(block_means, settings['confidence']):.4g} (target {ci_target:.4g})")
 
-    # Concatenate results and compute mean/std per process
-    df_all = pd.concat(all_sim_dfs, ignore_index=True)
-    numeric_cols = [c for c in df_all.columns if c not in ['Process', 'sim']]
-
-    # Per-process metrics: mean, std, min, max for each numeric column
-    grouped = df_all.groupby('Process')[numeric_cols].agg(['mean', 'std', 'min', 'max'])
-    # Flatten multiindex columns
-    grouped.columns = [f"{col}_{stat}" for col, stat in grouped.columns]
-    grouped = grouped.reset_index()
-
-    # --- New outputs requested ---
-    # 1) Per-process total cost mean/std (Total column aggregated per process)
-    if 'Total' in df_all.columns:
-        proc_total = df_all.groupby('Process')['Total'].agg(['mean', 'std', 'min', 'max']).reset_index()
-        proc_total.columns = ['Process', 'Total_mean', 'Total_std', 'Total_min', 'Total_max']
-    else:
-        # If no Total column exists, sum numeric_cols to compute a total per Process per sim then aggregate
-        tmp = df_all.copy()
-        tmp['Total_calc'] = tmp[numeric_cols].sum(axis=1)
-        proc_total = tmp.groupby('Process')['Total_calc'].agg(['mean', 'std', 'min', 'max']).reset_index()
-        proc_total.columns = ['Process', 'Total_mean', 'Total_std', 'Total_min', 'Total_max']
-
-    # 2) Component-level aggregated mean/std across simulations (sum across processes per sim, then compute mean/std)
-    # For this, group by simulation and sum numeric columns across processes
-    # Exclude the per-simulation 'Total' row added by conv_cost_to_df to avoid double-counting
-    df_proc = df_all[df_all['Process'] != 'Total']
-    comp_per_sim = df_proc.groupby('sim')[numeric_cols].sum()
-    comp_stats = comp_per_sim.agg(['mean', 'std', 'min', 'max']).transpose().reset_index()
-    # rename columns for clarity
-    comp_stats.columns = ['Component', 'mean', 'std', 'min', 'max']
+    # Per-process metrics (mean, std, min, max per cost category), per-process total cost and component-level
+    # statistics (cost categories summed across processes) all come from the streaming accumulator
+    grouped, proc_total, comp_stats = acc.summary_frames()
 
     return grouped, proc_total, comp_stats
 
 
-def _print_progress(completed: int, total: int, bar_len: int = 40):
-    """Print a simple progress bar to the terminal (overwrites the same line)."""
-    if total <= 0:
-        return
-    completed = max(0, min(completed, total))
-    frac = completed / total
-    filled = int(round(frac * bar_len))
-    bar = '#' * filled + '-' * (bar_len - filled)
-    # \r to overwrite line; flush to ensure immediate update
-    sys.stdout.write(f"\rProgress: |{bar}| {completed}/{total} sims")
-    sys.stdout.flush()
+def resume_run(checkpoint, workers: int = 1, checkpoint_every: int = 1):
+    """Continue an interrupted run from its checkpoint directory.
+
+    The remaining blocks are evaluated with the run's original settings (and draw store, if any), and the summary
+    DataFrames of the whole run are returned as by `monte_carlo_run`. For a run that already finished, its final
+    summary is returned without evaluating anything.
+    """
+    state = _load_checkpoint(checkpoint)
+    if state['done']:
+        return state['final'].summary_frames()
+    return _run(state['settings'], state['n_sim'], state['ci_target'], workers, checkpoint, checkpoint_every, state)
+
+
+def extend_run(checkpoint, n_extra: int, workers: int = 1, checkpoint_every: int = 1):
+    """Add n_extra draws to a finished (or interrupted) run saved in a checkpoint directory.
+
+    The result equals an uninterrupted run of the combined size with the same seed and settings, without the
+    stopping rule. The run's checkpoint and draw store are updated to the extended run.
+    """
+    state = _load_checkpoint(checkpoint)
+    n_sim = (state['n_draws'] if state['done'] else state['n_sim']) + n_extra
+    return _run(state['settings'], n_sim, None, workers, checkpoint, checkpoint_every, state)
+
 
 def save_results_and_plots(proc_total, comp_stats, output_path: Path, filename_prefix: str, labels: Dict[str, str] = None, n_modules_mw: float = 1.0, round_vals: bool = True):
     """Create two waterfall charts (process-level and component-level) and save as PNGs.
@@ -398,6 +567,47 @@ def save_results_and_plots(proc_total, comp_stats, output_path: Path, filename_p
 
     return proc_plot_path, comp_plot_path
 
+
+def save_tornado_plot(swings, output_path: Path, filename_prefix: str, labels: Dict[str, str] = None, n_modules_mw: float = 1.0, top: int = 15):
+    """Create a tornado chart of one-at-a-time unit cost swings and save as PNG.
+
+    Each bar spans the cost with the input at its low and at its high value, around the base cost (vertical line).
+    Inputs are ranked by swing, largest at the top.
+
+    swings: DataFrame with columns ['Parameter', 'Cost_base', 'Cost_low', 'Cost_high', 'Swing']
+        (see tools.sensitivity.tornado)
+    labels: optional dict to override axis/title labels; keys used below.
+    n_modules_mw: multiplier to scale costs for plotting
+    top: number of inputs shown
+    """
+    labels = labels or {}
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    df = swings.sort_values('Swing', ascending=False).head(top).iloc[::-1]
+    base = float(df['Cost_base'].iloc[0]) * n_modules_mw if len(df) else 0.0
+    y = list(range(len(df)))
+    low = (df['Cost_low'] * n_modules_mw).astype(float).tolist()
+    high = (df['Cost_high'] * n_modules_mw).astype(float).tolist()
+
+    fig, ax = plt.subplots(figsize=(12, max(4.0, 0.4 * len(df) + 1.5)))
+    ax.barh(y, [v - base for v in low], left=base, color='tab:blue', alpha=0.8, label=labels.get('low', 'Input at low'))
+    ax.barh(y, [v - base for v in high], left=base, color='tab:orange', alpha=0.8, label=labels.get('high', 'Input at high'))
+    ax.axvline(base, color='black', linewidth=1)
+
+    ax.set_yticks(y)
+    ax.set_yticklabels(df['Parameter'].astype(str).tolist())
+    ax.set_xlabel(labels.get('x', 'Cost ($/MW)'))
+    ax.set_title(labels.get('title', 'Unit Cost Sensitivity to Input Ranges'))
+    ax.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, pos: f'${x:,.0f}'))
+    ax.legend(loc='lower right')
+    plt.tight_layout()
+    tornado_plot_path = output_path / f"{filename_prefix}_tornado.png"
+    fig.savefig(tornado_plot_path, dpi=200)
+    plt.close(fig)
+
+    return tornado_plot_path
+
+
 if __name__ == '__main__':
     # Quick CLI for convenience
     import argparse
@@ -408,9 +618,42 @@ if __name__ == '__main__':
     parser.add_argument('--ann_prod_vol', type=int, default=2074)
     parser.add_argument('--n_sim', type=int, default=100)
     parser.add_argument('--level', default='base')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--sampler', choices=list(SAMPLERS), default='random')
+    parser.add_argument('--ci_target', type=float, default=None)
+    parser.add_argument('--block_size', type=int, default=BLOCK_SIZE)
+    parser.add_argument('--distribution', choices=list(DISTRIBUTIONS), default='uniform',
+                        help='distribution of inputs that do not declare one')
+    parser.add_argument('--independent', action='store_true', help='ignore the declared input correlations')
+    parser.add_argument('--antithetic', action='store_true', help='antithetic pairs of draws')
+    parser.add_argument('--control_variate', action='store_true', help='linearized cost model as control variate')
+    parser.add_argument('--store', default=None, help='directory to save the raw draws to')
+    parser.add_argument('--checkpoint', default=None, help='directory to save the run state to')
+    parser.add_argument('--resume', default=None, help='checkpoint directory of a run to continue')
+    parser.add_argument('--extend', type=int, default=0, help='with --resume, number of draws to add')
 
     args = parser.parse_args()
-    proc_by_metric, proc_total, comp_stats = monte_carlo_run(args.scenario, args.join_method, args.ann_prod_vol, args.n_sim, level=args.level)
+    if args.resume:
+        if args.extend:
+            proc_by_metric, proc_total, comp_stats = extend_run(args.resume, args.extend, workers=args.workers)
+        else:
+            proc_by_metric, proc_total, comp_stats = resume_run(args.resume, workers=args.workers)
+    else:
+        plan = scenario_plan(args.scenario, args.join_method, level=args.level, distribution=args.distribution,
+                             correlations=not args.independent)
+        print(f'{plan.n_dims} uncertain inputs:')
+        print(plan.summary())
+        proc_by_metric, proc_total, comp_stats = monte_carlo_run(args.scenario, args.join_method, args.ann_prod_vol,
+                                                                 args.n_sim, level=args.level, seed=args.seed,
+                                                                 workers=args.workers, sampler=args.sampler,
+                                                                 ci_target=args.ci_target,
+                                                                 block_size=args.block_size, store=args.store,
+                                                                 checkpoint=args.checkpoint,
+                                                                 distribution=args.distribution,
+                                                                 correlations=not args.independent,
+                                                                 antithetic=args.antithetic,
+                                                                 control_variate=args.control_variate)
     print('\nProcess-level metrics (mean/std) sample:')
     print(proc_by_metric.head())
     print('\nPer-process total cost mean/std:')
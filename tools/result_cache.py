@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from tools.input_tree import InputTree
+
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Packages whose source defines the cost model; editing them invalidates cached results
+_MODEL_PACKAGES = ('analyses', 'parts', 'pbcm', 'tools')
+
+_STATS = 'stats.json'
+_SUFFIX = '.pkl'
+
+_MISSING = object()
+
+
+def write_atomic(path: Path, data: bytes):
+    """Writes data to path through a uniquely named temporary file, so concurrent writers never share one."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def content_hash(*parts) -> str:
+    """SHA-256 of the canonical (sorted-key) JSON encoding of parts."""
+    text = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def source_hash(packages=_MODEL_PACKAGES, root: Path = _REPO_ROOT) -> str:
+    """SHA-256 of the contents of every .py file in the given packages of the repository."""
+    h = hashlib.sha256()
+    for pkg in packages:
+        for p in sorted((Path(root) / pkg).rglob('*.py')):
+            h.update(str(p.relative_to(root)).encode())
+            h.update(p.read_bytes())
+    return h.hexdigest()
+
+
+def scenario_key(tree: InputTree, scenario_name: str, **settings) -> str:
+    """
+    Cache key of a result computed from a scenario.
+
+    Parameters
+    ----------
+    tree: InputTree
+        Parsed input_data tree the scenario is built from. Its parsed content is hashed, so comments and formatting
+        of the json files do not matter.
+
+    scenario_name: str
+        Scenario module (e.g. 'mphx_sabic').
+
+    settings:
+        Everything else the result depends on (join method, APV, level, sampler, seed, n_sim, ...).
+
+    Returns
+    -------
+    key: str
+        Hash of the inputs, the scenario, the settings and the source of the cost model.
+    """
+    return content_hash(tree.data, scenario_name, settings, source_hash())
+
+
+class ResultCache:
+
+    def __init__(self, path, max_bytes: int = 256 * 2 ** 20):
+        """
+        Initializes a persistent on-disk cache of computed results (cost results, summary frames, ...), each stored
+        as a pickle named by its content-addressed key (see scenario_key).
+
+        Entries are evicted least-recently-used first once the cache holds more than max_bytes; reading an entry
+        marks it used. Hit and miss counts are kept in the cache directory across runs.
+
+        Parameters
+        ----------
+        path: str or Path
+            Cache directory. Created if missing.
+
+        max_bytes: int
+            Size limit of all entries together.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def _file(self, key: str) -> Path:
+        return self.path / (key + _SUFFIX)
+
+    def _entries(self) -> list:
+        return list(self.path.glob('*' + _SUFFIX))
+
+    def _count(self, field: str):
+        stats = self._read_stats()
+        stats[field] += 1
+        write_atomic(self.path / _STATS, json.dumps(stats).encode())
+
+    def _read_stats(self) -> dict:
+        try:
+            return json.loads((self.path / _STATS).read_text())
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0}
+
+    def __contains__(self, key: str) -> bool:
+        return self._file(key).exists()
+
+    def get(self, key: str, default=None):
+        """Returns the result stored under key (and marks it used), or default if there is none."""
+        f = self._file(key)
+        try:
+            value = pickle.loads(f.read_bytes())
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self._count('misses')
+            return default
+        os.utime(f)
+        self._count('hits')
+        return value
+
+    def put(self, key: str, value):
+        """Stores a result under key, then evicts least recently used entries beyond max_bytes."""
+        write_atomic(self._file(key), pickle.dumps(value))
+        self.evict()
+
+    def get_or_compute(self, key: str, compute):
+        """Returns the result stored under key, or computes it with compute() and stores it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        """Deletes least recently used entries until the cache holds at most max_bytes."""
+        entries = [(p.stat().st_mtime_ns, p.stat().st_size, p) for p in self._entries()]
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+
+    def invalidate(self, key: str = None):
+        """Deletes the entry stored under key, or every entry if key is None."""
+        files = [self._file(key)] if key is not None else self._entries()
+        for p in files:
+            p.unlink(missing_ok=True)
+
+    @property
+    def stats(self) -> dict:
+        """Hit and miss counts, number of entries and their total size in bytes."""
+        entries = self._entries()
+        return dict(self._read_stats(), entries=len(entries), bytes=sum(p.stat().st_size for p in entries))
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from tools.input_range import DISTRIBUTIONS, InputRange
+from tools.input_tree import InputTree
+
+
+# create_hx reads process cycle times in seconds and stores them on ProcessStep in hours
+_PROCESS_ATTRS = {'time_cycle': 3600.0}
+
+# Rank correlations between uncertain inputs, relative to the input_data root
+CORRELATIONS = 'uncertainty/correlations.json'
+
+
+class PlanEntry:
+
+    def __init__(self, file, key, low, high, base=None, distribution='uniform', targets=None, mean=None, std_dev=None):
+        """
+        Initializes one uncertain input parameter of a sampling plan.
+
+        Parameters
+        ----------
+        file: str
+            Path of the input file, relative to the input_data root.
+
+        key: str
+            Key of the {"base", "low", "high"} leaf within the file (the attribute name of the object built from it).
+
+        low: float
+            Lower bound of the parameter.
+
+        high: float
+            Upper bound of the parameter.
+
+        base: float, optional
+            Base (best estimate) value of the parameter.
+
+        distribution: str
+            Name of the distribution the parameter is drawn from (see input_range.DISTRIBUTIONS).
+
+        targets: list, optional
+            (object, attribute, divisor) triples the sampled value is written to once the plan is bound to a
+            scenario. The value set on the object is sampled value / divisor.
+
+        mean: float, optional
+            Mean of a normal or lognormal parameter (defaults to base).
+
+        std_dev: float, optional
+            Standard deviation of a normal or lognormal parameter (defaults to a sixth of the range).
+        """
+        self.file = file
+        self.key = key
+        self.low = low
+        self.high = high
+        self.base = base
+        self.distribution = distribution
+        self.targets = targets or []
+        self.mean = mean
+        self.std_dev = std_dev
+
+    @property
+    def path(self) -> str:
+        return f"{self.file}:{self.key}"
+
+    @property
+    def input_range(self) -> InputRange:
+        return InputRange(self.file, distribution=self.distribution, upper=self.high, lower=self.low, mean=self.mean,
+                          std_dev=self.std_dev, best=self.base)
+
+    def copy(self, **kwargs) -> "PlanEntry":
+        res = PlanEntry(self.file, self.key, self.low, self.high, self.base, self.distribution, list(self.targets),
+                        self.mean, self.std_dev)
+        for k, v in kwargs.items():
+            setattr(res, k, v)
+        return res
+
+
+class SamplingPlan:
+    """Flat, fixed-width list of the uncertain parameters of an input tree.
+
+    Column j of a parameter matrix (one row per draw) holds the values of entries[j]. Samplers fill the matrix in
+    bulk (`to_values` maps unit-cube samples onto the parameter bounds) and `apply` writes its columns onto the
+    objects of a bound scenario, whose numeric attributes then hold one value per draw for calc_cost_batch.
+
+    `corr` optionally holds the (n_dims x n_dims) Gaussian copula correlation matrix of the parameters (see
+    `correlate`); without it the columns are drawn independently.
+    """
+
+    def __init__(self, entries: List[PlanEntry], corr: np.ndarray = None):
+        self.entries = entries
+        self.corr = corr
+
+    @property
+    def n_dims(self) -> int:
+        return len(self.entries)
+
+    @property
+    def paths(self) -> List[str]:
+        return [e.path for e in self.entries]
+
+    @property
+    def low(self) -> np.ndarray:
+        return np.array([e.low for e in self.entries], dtype=float)
+
+    @property
+    def high(self) -> np.ndarray:
+        return np.array([e.high for e in self.entries], dtype=float)
+
+    @property
+    def base(self) -> np.ndarray:
+        return np.array([e.base for e in self.entries], dtype=float)
+
+    @property
+    def expected(self) -> np.ndarray:
+        """Expected value of each parameter under its distribution."""
+        return np.array([e.input_range.expected() for e in self.entries], dtype=float)
+
+    def oat_matrix(self) -> np.ndarray:
+        """
+        Parameter matrix of a one-at-a-time design around the base values.
+
+        Returns
+        -------
+        x: ndarray
+            Shape (2 * n_dims + 1, n_dims). Row 0 holds the base values; rows 2j+1 and 2j+2 hold parameter j at its
+            low and at its high value, all others at base.
+        """
+        d = self.n_dims
+        x = np.tile(self.base, (2 * d + 1, 1))
+        x[1 + 2 * np.arange(d), np.arange(d)] = self.low
+        x[2 + 2 * np.arange(d), np.arange(d)] = self.high
+        return x
+
+    def index(self, path: str) -> int:
+        return self.paths.index(path)
+
+    def to_values(self, u: np.ndarray) -> np.ndarray:
+        """Maps unit-cube samples of shape (n, n_dims) onto the parameter distributions, one column at a time."""
+        u = self.couple(u)
+        values = self.low + (self.high - self.low) * u
+        for j, e in enumerate(self.entries):
+            if e.distribution != 'uniform':
+                values[:, j] = e.input_range.ppf(u[:, j])
+        return values
+
+    def couple(self, u: np.ndarray) -> np.ndarray:
+        """
+        Imposes the plan's rank correlations on independent unit-cube samples (Gaussian copula). Columns of
+        uncorrelated parameters are returned unchanged; correlated ones stay uniform, so any marginal distribution
+        can be applied afterwards.
+        """
+        u = np.asarray(u, dtype=float)
+        if self.corr is None:
+            return u
+        cols = np.flatnonzero((self.corr != np.eye(self.n_dims)).any(axis=0))
+        if cols.size == 0:
+            return u
+        chol = np.linalg.cholesky(self.corr[np.ix_(cols, cols)])
+        eps = np.finfo(float).eps
+        z = norm.ppf(np.clip(u[:, cols], eps, 1 - eps)) @ chol.T
+        u = u.copy()
+        u[:, cols] = norm.cdf(z)
+        return u
+
+    def correlate(self, pairs) -> "SamplingPlan":
+        """
+        Returns a copy of the plan with rank correlations between its parameters.
+
+        Parameters
+        ----------
+        pairs: iterable
+            (path a, path b, rho) triples: Spearman rank correlation rho between parameters "file:key" a and b. Pairs
+            naming a parameter that is not in the plan are ignored (mc_common.build_scenario warns about those
+            naming an uncertain input its scenario does not use).
+
+        Returns
+        -------
+        plan: SamplingPlan
+            Plan whose corr is the Gaussian copula correlation matrix (Pearson r = 2 sin(pi rho / 6) of the normal
+            scores), projected onto the nearest valid correlation matrix if the pairs are inconsistent.
+        """
+        index = {p: j for j, p in enumerate(self.paths)}
+        corr = np.eye(self.n_dims)
+        for a, b, rho in pairs:
+            if a in index and b in index and a != b:
+                corr[index[a], index[b]] = corr[index[b], index[a]] = 2 * np.sin(np.pi * rho / 6)
+        w, v = np.linalg.eigh(corr)
+        if w.min() <= 0:
+            corr = v @ np.diag(np.clip(w, 1e-8, None)) @ v.T
+            d = np.sqrt(np.diag(corr))
+            corr = corr / np.outer(d, d)
+        return SamplingPlan(self.entries, corr)
+
+    def bind(self, tree: InputTree, model_hx, mfg_process, over, fac) -> "SamplingPlan":
+        """
+        Resolves the objects each entry writes to within a scenario built from `tree` (see create_hx).
+
+        Objects built by InputTree.object are matched through their raw attribute, which holds the parsed data of
+        the file they came from. Process cycle times are matched to the ProcessStep with the same name.
+
+        Returns
+        -------
+        plan: SamplingPlan
+            A new plan holding only the entries with at least one target in this scenario. Its n_dims is the number
+            of inputs that actually vary the scenario's cost.
+        """
+        objects = {}
+        candidates = [model_hx, over, fac] + list(getattr(model_hx, 'subs', {}).values())
+        for ps in mfg_process.values():
+            candidates += [ps.part, getattr(ps.part, 'mat', None), ps.mach] + list(ps.mach.consume_list.values())
+        for obj in candidates:
+            raw = getattr(obj, 'raw', None)
+            if raw is not None:
+                objects.setdefault(id(raw), {})[id(obj)] = obj
+
+        steps = {ps.name_process_step: ps for ps in mfg_process.values()}
+
+        entries = []
+        for e in self.entries:
+            data = tree.get(e.file)
+            targets = [(obj, e.key, 1.0) for obj in objects.get(id(data), {}).values()]
+            if e.file.startswith('processes/') and e.key in _PROCESS_ATTRS and data.get('name') in steps:
+                targets.append((steps[data['name']], e.key, _PROCESS_ATTRS[e.key]))
+            if targets:
+                entries.append(e.copy(targets=targets))
+        return SamplingPlan(entries)
+
+    def apply(self, values: np.ndarray):
+        """Writes the columns of a parameter matrix of shape (n, n_dims) onto the bound objects."""
+        values = np.asarray(values, dtype=float)
+        for j, e in enumerate(self.entries):
+            for obj, attr, divisor in e.targets:
+                setattr(obj, attr, values[:, j] / divisor if divisor != 1.0 else values[:, j])
+
+    def summary(self) -> pd.DataFrame:
+        """One row per uncertain parameter: path, bounds, base value, distribution and number of bound targets."""
+        return pd.DataFrame([{'Parameter': e.path, 'base': e.base, 'low': e.low, 'high': e.high,
+                              'distribution': e.distribution, 'mean': e.mean, 'std_dev': e.std_dev,
+                              'targets': len(e.targets)} for e in self.entries])
+
+
+def read_correlations(tree: InputTree, rel: str = CORRELATIONS) -> list:
+    """
+    Reads rank correlations declared in the input tree.
+
+    The file holds {"rank_correlations": [{"a": "file:key", "b": "file:key", "rho": value}, ...]}.
+
+    Returns
+    -------
+    pairs: list
+        (path a, path b, rho) triples, empty if the tree has no correlation file.
+    """
+    if str(rel) not in tree.data:
+        return []
+    return [(c['a'], c['b'], float(c['rho'])) for c in tree.get(rel).get('rank_correlations', [])]
+
+
+def compile_plan(tree: InputTree, level: str = 'base', distribution: str = 'uniform') -> SamplingPlan:
+    """
+    Scans a parsed input tree once and collects every truly uncertain parameter.
+
+    Parameters
+    ----------
+    tree: InputTree
+        Parsed input_data tree.
+
+    level: str
+        Level whose value is reported as the entry's base value (falls back to 'base').
+
+    distribution: str
+        Distribution of the leaves that do not declare one. A leaf declares its own with a "distribution" key (see
+        input_range.DISTRIBUTIONS), and optionally "mean" and "std_dev" for normal and lognormal.
+
+    Returns
+    -------
+    plan: SamplingPlan
+        One entry per top-level {"base", "low", "high"} leaf with numeric bounds. Leaves with low == high are
+        constant and dropped.
+    """
+    entries = []
+    for rel, data in tree.data.items():
+        if not isinstance(data, dict):
+            continue
+        for key, node in data.items():
+            if not (isinstance(node, dict) and isinstance(node.get('low'), (int, float))
+                    and isinstance(node.get('high'), (int, float))):
+                continue
+            if node['low'] == node['high']:
+                continue
+            dist = node.get('distribution', distribution)
+            if dist not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution {dist} for {rel}:{key}; supported: {list(DISTRIBUTIONS)}")
+            entries.append(PlanEntry(rel, key, float(node['low']), float(node['high']),
+                                     node.get(level, node.get('base')), dist, mean=node.get('mean'),
+                                     std_dev=node.get('std_dev')))
+    return SamplingPlan(entries)
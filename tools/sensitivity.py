@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from tools.mc_common import SCENARIO_MAP, build_scenario, default_tree, unit_samples
+from tools.mc_stats import COST_METRICS
+
+
+def _saltelli_matrices(n_base: int, d: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Builds the Saltelli sample in the unit cube.
+
+    Returns
+    -------
+    u: ndarray
+        Shape (d + 2, n_base, d): base matrices A and B followed by AB_i (A with column i taken from B) for each
+        parameter i.
+    """
+    ab = unit_samples('sobol', rng, n_base, 2 * d)
+    a, b = ab[:, :d], ab[:, d:]
+    u = np.empty((d + 2, n_base, d))
+    u[0], u[1] = a, b
+    for i in range(d):
+        u[2 + i] = a
+        u[2 + i][:, i] = b[:, i]
+    return u
+
+
+def _indices(y: np.ndarray):
+    """
+    First-order (Saltelli 2010) and total-effect (Jansen) estimators.
+
+    Parameters
+    ----------
+    y: ndarray
+        Model output of shape (d + 2, n) ordered as the Saltelli matrices (A, B, AB_1 ... AB_d).
+
+    Returns
+    -------
+    s1, st: ndarray
+        First-order and total-effect indices, one per parameter (nan if the output does not vary).
+    """
+    # Centering does not change the indices but removes the (large) mean cost from the estimators' variance
+    y = y - np.concatenate([y[0], y[1]]).mean()
+    y_a, y_b, y_ab = y[0], y[1], y[2:]
+    var = np.var(np.concatenate([y_a, y_b]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s1 = np.mean(y_b * (y_ab - y_a), axis=1) / var
+        st = 0.5 * np.mean((y_a - y_ab) ** 2, axis=1) / var
+    if var == 0:
+        s1[:], st[:] = np.nan, np.nan
+    return s1, st
+
+
+def sobol_indices(scenario_name: str, join_method: str, ann_prod_vol: int, n_base: int = 1024, level: str = "base",
+                  seed: int = None, n_boot: int = 100, confidence: float = 0.95,
+                  distribution: str = 'uniform') -> pd.DataFrame:
+    """
+    Computes first-order and total-effect Sobol indices of unit cost with respect to the uncertain inputs of a
+    scenario (its sampling plan: every input with low != high that the scenario uses, drawn from its declared
+    distribution or `distribution`).
+
+    The Saltelli design (scrambled Sobol base matrices A and B, and A with each column in turn taken from B) takes
+    n_base * (n_parameters + 2) evaluations, all written onto the scenario objects at once and evaluated in a
+    single calc_cost_batch call.
+
+    Parameters
+    ----------
+    scenario_name: str
+        'mphx_sabic' or 'mphx_oct24'
+
+    join_method: str
+        Passed to create_hx
+
+    ann_prod_vol: int
+        Annual production volume
+
+    n_base: int
+        Rows of the base matrices (a power of 2)
+
+    level: str
+        Input level the scenario is built at (sampled inputs replace it)
+
+    seed: int, optional
+        Seed of the Sobol scrambling and the bootstrap
+
+    n_boot: int
+        Number of bootstrap resamples for the confidence intervals (0 skips them)
+
+    confidence: float
+        Confidence level of the intervals
+
+    distribution: str
+        Distribution of the inputs that do not declare one (see tools.input_range.DISTRIBUTIONS)
+
+    Returns
+    -------
+    indices: DataFrame
+        One row per (Output, Parameter) with columns 'S1', 'S1_conf', 'ST', 'ST_conf'. Outputs are the total unit
+        cost ('Total') and each cost category ('Material', 'Equipment', ...) summed over processes. Conf columns are
+        the half-widths of the bootstrap confidence intervals. Indices are nan for outputs that do not vary.
+    """
+    if scenario_name not in SCENARIO_MAP:
+        raise ValueError(f"Unknown scenario_name {scenario_name}; supported: {list(SCENARIO_MAP.keys())}")
+    from analyses.cost_batch import calc_cost_batch
+    from pbcm.cost_items.Prepared_Process import prepare_processes
+
+    tree = default_tree()
+    # Sobol indices assume independent inputs, so declared correlations are not imposed
+    (model_hx, mfg_process, over, fac), plan = build_scenario(scenario_name, join_method, level, tree,
+                                                              distribution, correlations=False)
+    d = plan.n_dims
+
+    rng = np.random.default_rng(seed)
+    u = _saltelli_matrices(n_base, d, rng)
+    plan.apply(plan.to_values(u.reshape(-1, d)))
+    cost = calc_cost_batch(ann_prod_vol, prepare_processes(mfg_process), model_hx, over, fac)
+
+    z = norm.ppf(0.5 + confidence / 2)
+    boot_rows = rng.integers(0, n_base, size=(n_boot, n_base))
+    frames = []
+    for key, name in COST_METRICS.items():
+        y = np.broadcast_to(cost.cat_total(key), (u.shape[0] * n_base,)).reshape(u.shape[0], n_base)
+        s1, st = _indices(y)
+        s1_conf = st_conf = np.full(d, np.nan)
+        if n_boot > 0:
+            boot = [_indices(y[:, rows]) for rows in boot_rows]
+            s1_conf = z * np.std([b[0] for b in boot], axis=0, ddof=1)
+            st_conf = z * np.std([b[1] for b in boot], axis=0, ddof=1)
+        frames.append(pd.DataFrame({'Output': name, 'Parameter': plan.paths, 'S1': s1, 'S1_conf': s1_conf,
+                                    'ST': st, 'ST_conf': st_conf}))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def tornado(scenario_name: str, join_method: str, ann_prod_vol: int, level: str = "base"):
+    """
+    One-at-a-time sensitivity of unit cost: each uncertain input of a scenario (its sampling plan) is set to its low
+    and to its high value while all others stay at `level`. The base case and all 2 * n_parameters cases are
+    written onto the scenario objects at once and evaluated in a single calc_cost_batch call.
+
+    Parameters
+    ----------
+    scenario_name: str
+        'mphx_sabic' or 'mphx_oct24'
+
+    join_method: str
+        Passed to create_hx
+
+    ann_prod_vol: int
+        Annual production volume
+
+    level: str
+        Input level of the base case
+
+    Returns
+    -------
+    swings: DataFrame
+        One row per parameter with its 'Input_low', 'Input_base', 'Input_high' values, the unit cost of the base case
+        ('Cost_base') and with the parameter at low and high ('Cost_low', 'Cost_high'), and 'Swing' = |Cost_high -
+        Cost_low|. Sorted by decreasing swing.
+
+    proc_swings: DataFrame
+        The same for the total cost of each process step, with a 'Process' column. Sorted by process, then by
+        decreasing swing.
+    """
+    if scenario_name not in SCENARIO_MAP:
+        raise ValueError(f"Unknown scenario_name {scenario_name}; supported: {list(SCENARIO_MAP.keys())}")
+    from analyses.cost_batch import calc_cost_batch
+    from pbcm.cost_items.Prepared_Process import prepare_processes
+
+    tree = default_tree()
+    (model_hx, mfg_process, over, fac), plan = build_scenario(scenario_name, join_method, level, tree,
+                                                              correlations=False)
+    d = plan.n_dims
+
+    # Row 0 is the base case; rows 2i+1 and 2i+2 hold parameter i at low and at high
+    base = plan.base
+    plan.apply(plan.oat_matrix())
+    cost = calc_cost_batch(ann_prod_vol, prepare_processes(mfg_process), model_hx, over, fac)
+
+    def swing_frame(y):
+        y = np.broadcast_to(y, (2 * d + 1,))
+        return pd.DataFrame({'Parameter': plan.paths, 'Input_low': plan.low, 'Input_base': base,
+                             'Input_high': plan.high, 'Cost_base': y[0], 'Cost_low': y[1::2], 'Cost_high': y[2::2],
+                             'Swing': np.abs(y[2::2] - y[1::2])})
+
+    swings = swing_frame(cost.cat_total('total')).sort_values('Swing', ascending=False, ignore_index=True)
+    proc_swings = pd.concat([swing_frame(v['total']).assign(Process=k) for k, v in cost.proc_cost.items()])
+    proc_swings = proc_swings[['Process'] + [c for c in proc_swings.columns if c != 'Process']]
+    proc_swings = proc_swings.sort_values(['Process', 'Swing'], ascending=[True, False], ignore_index=True)
+
+    return swings, proc_swings
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Sobol sensitivity indices of the MPHX cost model')
+    parser.add_argument('--scenario', choices=list(SCENARIO_MAP), default='mphx_sabic')
+    parser.add_argument('--join_method', default='Laser Welding')
+    parser.add_argument('--ann_prod_vol', type=int, default=2074)
+    parser.add_argument('--n_base', type=int, default=1024)
+    parser.add_argument('--level', default='base')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=None, help='csv file to save all indices to')
+
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    res = sobol_indices(args.scenario, args.join_method, args.ann_prod_vol, n_base=args.n_base, level=args.level,
+                        seed=args.seed)
+    print(f'Sobol indices computed in {time.perf_counter() - t0:.1f} s')
+    with pd.option_context('display.width', 160, 'display.max_colwidth', 70):
+        print(res[res['Output'] == 'Total'].sort_values('ST', ascending=False).to_string(index=False))
+    if args.output:
+        res.to_csv(args.output, index=False)
@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -7,7 +8,10 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 
-from tools.monte_carlo import monte_carlo_run, save_results_and_plots
+from tools.monte_carlo import cached_monte_carlo_run, save_results_and_plots, save_tornado_plot
+from tools.result_cache import ResultCache
+from tools.sensitivity import tornado
+from tools.mc_compare import compare_join_methods
 from datetime import datetime
 from pathlib import Path
 
@@ -21,18 +25,37 @@ if __name__ == "__main__":
     # ensure output directory exists
     output_path.mkdir(parents=True, exist_ok=True)
 
+    # Scrambled Sobol draws; each run stops once the 95% CI of the mean total cost is within +/- $0.50 (at most 10000)
+    # Raw draws are kept in outputs/draws_* for later analysis (tools.mc_store.load_draws)
+    # Seeded runs are cached in outputs/.cache; a rerun with unchanged inputs, settings and model code returns the
+    # stored summaries without simulating (and without writing draws)
+    cache = ResultCache(output_path / '.cache')
     # Run Monte Carlo for Laser Welding and save all three returned DataFrames
-    proc_by_metric_lw, proc_total_lw, comp_stats_lw = monte_carlo_run(scenario_name='mphx_sabic', join_method="Laser Welding", ann_prod_vol=2074, n_sim=10000, level='base')
+    proc_by_metric_lw, proc_total_lw, comp_stats_lw = cached_monte_carlo_run(cache, scenario_name='mphx_sabic', join_method="Laser Welding", ann_prod_vol=2074, n_sim=10000, seed=42, level='base', workers=os.cpu_count(), sampler='sobol', ci_target=0.5, block_size=256, store=output_path / f'draws_{formatted_now}_lw')
     proc_by_metric_lw.to_csv(output_path / f'proc_by_metric_{formatted_now}_lw.csv', index=False)
     proc_total_lw.to_csv(output_path / f'proc_total_{formatted_now}_lw.csv', index=False)
     comp_stats_lw.to_csv(output_path / f'comp_stats_{formatted_now}_lw.csv', index=False)
     # create and save plots for LW
     save_results_and_plots(proc_total_lw, comp_stats_lw, output_path, f'plots_{formatted_now}_lw', n_modules_mw=112)
+    # One-at-a-time low/high swings of each input
+    swings_lw, proc_swings_lw = tornado(scenario_name='mphx_sabic', join_method="Laser Welding", ann_prod_vol=2074, level='base')
+    swings_lw.to_csv(output_path / f'tornado_{formatted_now}_lw.csv', index=False)
+    proc_swings_lw.to_csv(output_path / f'tornado_proc_{formatted_now}_lw.csv', index=False)
+    save_tornado_plot(swings_lw, output_path, f'plots_{formatted_now}_lw', n_modules_mw=112)
 
     # Run Monte Carlo for Gluing and save all three returned DataFrames
-    proc_by_metric_gl, proc_total_gl, comp_stats_gl = monte_carlo_run(scenario_name='mphx_sabic', join_method="Gluing", ann_prod_vol=2074, n_sim=10000, level='base')
+    proc_by_metric_gl, proc_total_gl, comp_stats_gl = cached_monte_carlo_run(cache, scenario_name='mphx_sabic', join_method="Gluing", ann_prod_vol=2074, n_sim=10000, seed=42, level='base', workers=os.cpu_count(), sampler='sobol', ci_target=0.5, block_size=256, store=output_path / f'draws_{formatted_now}_gl')
     proc_by_metric_gl.to_csv(output_path / f'proc_by_metric_{formatted_now}_gl.csv', index=False)
     proc_total_gl.to_csv(output_path / f'proc_total_{formatted_now}_gl.csv', index=False)
     comp_stats_gl.to_csv(output_path / f'comp_stats_{formatted_now}_gl.csv', index=False)
     # create and save plots for Gluing
     save_results_and_plots(proc_total_gl, comp_stats_gl, output_path, f'plots_{formatted_now}_gl', n_modules_mw=112)
+    # One-at-a-time low/high swings of each input
+    swings_gl, proc_swings_gl = tornado(scenario_name='mphx_sabic', join_method="Gluing", ann_prod_vol=2074, level='base')
+    swings_gl.to_csv(output_path / f'tornado_{formatted_now}_gl.csv', index=False)
+    proc_swings_gl.to_csv(output_path / f'tornado_proc_{formatted_now}_gl.csv', index=False)
+    save_tornado_plot(swings_gl, output_path, f'plots_{formatted_now}_gl', n_modules_mw=112)
+
+    # Paired comparison: both join methods evaluated on the same sampled inputs, reporting the per-draw difference
+    join_compare = compare_join_methods(scenario_name='mphx_sabic', join_methods=["Laser Welding", "Gluing"], ann_prod_vol=2074, n_sim=4096, level='base', sampler='sobol', block_size=256)
+    join_compare.to_csv(output_path / f'join_compare_{formatted_now}.csv', index=False)
@@ -15,6 +15,8 @@ from analyses.cost_output import calc_cost_obj, conv_cost_to_df
 # from analyses.iterations.mphx_oct24 import create_hx
 from analyses.iterations.mphx_sabic import create_hx
 from tools.color_scheme import set_color_scheme
+from tools.input_tree import InputTree
+from tools.result_cache import ResultCache, scenario_key
 from datetime import datetime
 
 now = datetime.now()
@@ -29,7 +31,8 @@ if __name__ == "__main__":
     # SCENARIO: EOS M290, with tolerance
 
     # initialize model from baseline
-    model_hx, mfg_process, over, fac = create_hx(join_method="Gluing", level='base')
+    inputs = InputTree.load(PROJECT_ROOT / 'input_data')
+    model_hx, mfg_process, over, fac = create_hx(join_method="Gluing", level='base', inputs=inputs)
     ann_prod_vol = 2074
 
 
@@ -39,10 +42,15 @@ if __name__ == "__main__":
     #Set cost_functions unit
     cost_norm = ann_prod_vol
 
-    # calculate cost_functions
-    cost_bd_baseline = calc_cost_obj(baseline)
+    # calculate cost_functions (reused from the result cache if inputs, settings and model code are unchanged)
+    cache = ResultCache(output_path / '.cache')
+    # Key by the module create_hx was imported from, so switching the scenario import switches the cache entry
+    scenario_name = create_hx.__module__.rsplit('.', 1)[-1]
+    key = scenario_key(inputs, scenario_name, run='calc_cost', join_method="Gluing", ann_prod_vol=ann_prod_vol,
+                       level='base')
+    cost_bd_baseline = cache.get_or_compute(key, lambda: calc_cost_obj(baseline))
 
-    df_base_cost = conv_cost_to_df(mfg_process, cost_bd_baseline)
+    df_base_cost = conv_cost_to_df(cost_bd_baseline)
 
     # Save CSV using robust path
     df_base_cost.to_csv(output_path / f'cost_bd_proc_{formatted_now}.csv', index=False)